@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, StudySession, StudyGroup, SessionRSVP, GroupMembership, Badge
+from .models import User, StudySession, StudyGroup, SessionRSVP, GroupMembership, Badge, XPEvent, Recommendation
 
 
 @admin.register(User)
@@ -64,3 +64,20 @@ class BadgeAdmin(admin.ModelAdmin):
     list_display = ['name', 'user', 'earned_at']
     list_filter = ['name', 'earned_at']
     search_fields = ['user__username', 'name']
+
+
+@admin.register(XPEvent)
+class XPEventAdmin(admin.ModelAdmin):
+    """XPEvent admin (read-only ledger)"""
+    list_display = ['user', 'amount', 'reason', 'created_at']
+    list_filter = ['reason', 'created_at']
+    search_fields = ['user__username']
+    readonly_fields = ['user', 'amount', 'reason', 'created_at']
+
+
+@admin.register(Recommendation)
+class RecommendationAdmin(admin.ModelAdmin):
+    """Recommendation admin (rebuilt by build_recommendations)"""
+    list_display = ['user', 'rank', 'group', 'session', 'score']
+    search_fields = ['user__username']
+    raw_id_fields = ['user', 'group', 'session']
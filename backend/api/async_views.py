@@ -0,0 +1,137 @@
+"""Async GET handlers for the hot read endpoints
+
+DRF views are sync-only, so under ASGI each request holds a worker thread from
+the first byte to the last. These handlers keep list/retrieve requests for
+sessions, groups, the leaderboard and the dashboard on the event loop and only
+leave it for database work, using Django's async ORM. They drive the existing
+viewsets (querysets, filters, permissions, response cache, ETags, serializers)
+so responses match the sync path exactly; writes, custom actions and keyset
+pagination are handed to the DRF view unchanged.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage
+from django.http import Http404
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+from .rank_index import rank_index
+from .stats import get_user_stats
+
+
+async def fetch(queryset):
+    """Evaluate a queryset (including its prefetches) through the async ORM"""
+    return [obj async for obj in queryset]
+
+
+def async_read_view(viewset_class, actions, read_class=None):
+    """URL view serving GET asynchronously and every other method through the DRF view"""
+    sync_view = sync_to_async(viewset_class.as_view(actions))
+    read_action = actions.get('get')
+    read_class = read_class or AsyncRead
+
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET' or read_action is None:
+            return await sync_view(request, *args, **kwargs)
+        return await read_class(viewset_class, read_action).dispatch(request, *args, **kwargs)
+
+    # Same as DRF's views: token-authenticated API, no cookie sessions to protect
+    view.csrf_exempt = True
+    return view
+
+
+class AsyncRead:
+    """One async GET against a viewset instance, mirroring APIView.dispatch()"""
+
+    def __init__(self, viewset_class, action):
+        self.view = viewset_class()
+        self.view.action_map = {'get': action}
+        self.view.action = action
+
+    async def dispatch(self, request, *args, **kwargs):
+        view = self.view
+        view.setup(request, *args, **kwargs)
+        view.format_kwarg = None
+        drf_request = view.initialize_request(request, *args, **kwargs)
+        view.request = drf_request
+        view.headers = view.default_response_headers
+
+        try:
+            # Authentication, permissions, the response cache and ETag validators,
+            # in one hop to the ORM's thread
+            await sync_to_async(view.initial)(drf_request, *args, **kwargs)
+            handler = view.__dict__.get('get')
+            if handler is not None:
+                # A mixin answered from the response cache or with 304 Not Modified
+                response = handler(drf_request, *args, **kwargs)
+            else:
+                response = await getattr(self, view.action)(drf_request)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+
+        return view.finalize_response(drf_request, response, *args, **kwargs)
+
+    async def list(self, request):
+        view = self.view
+        queryset = view.filter_queryset(view.get_queryset())
+        paginator = view.paginator
+        if not isinstance(paginator, PageNumberPagination):
+            # Keyset pages are rare and already a single query; keep the sync implementation
+            return await sync_to_async(view.list)(request)
+        page = await self.paginate(paginator, queryset, request)
+        serializer = view.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    async def paginate(self, paginator, queryset, request):
+        """PageNumberPagination.paginate_queryset() with the COUNT and page fetched asynchronously"""
+        page_size = paginator.get_page_size(request)
+        django_paginator = paginator.django_paginator_class(queryset, page_size)
+        # count is a cached_property, so page() below uses this instead of querying
+        django_paginator.count = await queryset.acount()
+        page_number = paginator.get_page_number(request, django_paginator)
+        try:
+            paginator.page = django_paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(paginator.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        paginator.page.object_list = await fetch(paginator.page.object_list)
+        paginator.request = request
+        return paginator.page.object_list
+
+    async def retrieve(self, request):
+        view = self.view
+        queryset = view.filter_queryset(view.get_queryset())
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        try:
+            instance = await queryset.aget(**{view.lookup_field: view.kwargs[lookup_url_kwarg]})
+        except (ObjectDoesNotExist, TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        view.check_object_permissions(request, instance)
+        return Response(view.get_serializer(instance).data)
+
+
+class AsyncLeaderboardRead(AsyncRead):
+
+    async def list(self, request):
+        if request.query_params.get('around') == 'me':
+            # Several dependent queries; keep the sync implementation
+            return await sync_to_async(self.view.list)(request)
+        rows = await fetch(self.view.get_leaders(request.query_params.get('period', 'week')))
+        # Ranks and badges come annotated and percentiles from the rank index, which
+        # only touches the database when it is due a reload
+        await sync_to_async(rank_index.ensure_fresh)()
+        return Response(self.view.leaderboard_data(rows))
+
+
+class AsyncDashboardRead(AsyncRead):
+
+    async def list(self, request):
+        user = request.user
+        # The upcoming sessions and the stats lookup do not depend on each other
+        upcoming_sessions, user_stats = await asyncio.gather(
+            fetch(self.view.get_upcoming_sessions(user)),
+            sync_to_async(get_user_stats)(user),
+        )
+        return Response(self.view.dashboard_data(user, upcoming_sessions, user_stats))
@@ -0,0 +1,100 @@
+"""Declarative badge rules and the engine that awards them
+
+Each rule awards a badge once a user's metric reaches a threshold. Metrics are
+values already kept up to date on every write: users.xp and the UserStats
+counters. award_xp and bump_user_stats name the users and metrics they change,
+and once the transaction commits only those users are checked, against only the
+rules watching those metrics, in one query. The award_badges command
+evaluates every rule for every user in the same set-based way.
+"""
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q
+
+from .cache import bump_profile_version, bump_version
+from .models import User, Badge
+
+# Metric name -> lookup from User
+METRICS = {
+    'xp': 'xp',
+    'sessions_attended': 'stats__sessions_attended',
+    'groups_joined': 'stats__groups_joined',
+    'sessions_hosted': 'stats__sessions_hosted',
+    'groups_created': 'stats__groups_created',
+}
+
+
+@dataclass(frozen=True)
+class BadgeRule:
+    name: str
+    icon: str
+    color: str
+    bg_color: str
+    metric: str
+    threshold: int
+
+    def earned(self):
+        """Condition on User for a user that qualifies for this badge but does not hold it"""
+        held = Badge.objects.filter(user=OuterRef('pk'), name=self.name)
+        return Q(**{f'{METRICS[self.metric]}__gte': self.threshold}) & ~Exists(held)
+
+    def badge(self, user_id):
+        return Badge(user_id=user_id, name=self.name, icon=self.icon, color=self.color, bg_color=self.bg_color)
+
+
+BADGE_RULES = [
+    BadgeRule('Rising Star', 'Zap', 'text-purple-500', 'bg-purple-500/20', 'xp', 500),
+    BadgeRule('Knowledge Seeker', 'BookOpen', 'text-blue-500', 'bg-blue-500/20', 'xp', 2000),
+    BadgeRule('Study Buddy', 'BookOpen', 'text-cyan-500', 'bg-cyan-500/20', 'sessions_attended', 5),
+    BadgeRule('Team Player', 'Users', 'text-green-500', 'bg-green-500/20', 'groups_joined', 3),
+    BadgeRule('Initiator', 'Zap', 'text-yellow-500', 'bg-yellow-500/20', 'groups_created', 1),
+    BadgeRule('Session Host', 'Target', 'text-orange-500', 'bg-orange-500/20', 'sessions_hosted', 3),
+]
+
+
+def award_badges(users, rules=BADGE_RULES, batch_size=1000):
+    """Create every badge in rules that users (a User queryset) qualify for and lack
+
+    One query finds the missing badges for all users and rules. Returns the
+    number of badges created.
+    """
+    flags = {
+        f'earns_{idx}': ExpressionWrapper(rule.earned(), output_field=BooleanField())
+        for idx, rule in enumerate(rules)
+    }
+    if not flags:
+        return 0
+    rows = users.order_by().annotate(**flags).filter(
+        reduce(or_, (Q(**{flag: True}) for flag in flags))
+    ).values_list('pk', *flags).iterator(chunk_size=batch_size)
+
+    created = 0
+    batch = []
+    for pk, *earns in rows:
+        batch.extend(rule.badge(pk) for rule, earned in zip(rules, earns) if earned)
+        if len(batch) >= batch_size:
+            created += _create(batch)
+            batch = []
+    if batch:
+        created += _create(batch)
+    return created
+
+
+def _create(badges):
+    # bulk_create skips post_save, so do badge_changed's work once for the batch.
+    # A concurrent check may have just awarded the same badge.
+    Badge.objects.bulk_create(badges, ignore_conflicts=True)
+    bump_profile_version(*{badge.user_id for badge in badges})
+    bump_version('leaderboard')
+    return len(badges)
+
+
+def check_badges(user_ids, metrics):
+    """Check these users against the rules watching metrics once the current transaction commits"""
+    rules = [rule for rule in BADGE_RULES if rule.metric in metrics]
+    if rules:
+        user_ids = list(user_ids)
+        transaction.on_commit(lambda: award_badges(User.objects.filter(pk__in=user_ids), rules))
@@ -0,0 +1,169 @@
+"""Versioned response cache for anonymous read endpoints
+
+Each cached collection (sessions, groups, leaderboard) has a version counter in
+the cache. Response keys embed the current versions of the collections a view
+depends on, so bumping a version after a write makes every stale entry
+unreachable at once instead of waiting for a TTL.
+
+Users resolved by JWT authentication are cached the same way, with one
+version counter per user, and so are serialized profiles (/api/auth/me/).
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework import permissions
+
+VERSION_KEY = 'resp-cache:version:{}'
+RESPONSE_KEY = 'resp-cache:{}:{}'
+USER_VERSION_KEY = 'auth-user:version:{}'
+USER_KEY = 'auth-user:{}:{}'
+PROFILE_VERSION_KEY = 'profile:version:{}'
+PROFILE_KEY = 'profile:{}:{}'
+
+# Validators stored with a cached body so conditional GETs can be answered from the cache
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _fresh_version():
+    # Seed from the clock so a version evicted from the cache is never reused
+    return int(time.time() * 1000)
+
+
+def get_versions(collections):
+    """Return the current version of each collection, initialising missing ones"""
+    return _get_versions([VERSION_KEY.format(name) for name in collections])
+
+
+def _get_versions(keys):
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, _fresh_version(), timeout=None)
+            found[key] = cache.get(key, _fresh_version())
+        versions.append(found[key])
+    return versions
+
+
+def bump_version(*collections):
+    """Invalidate every cached response that depends on the given collections
+
+    Inside a transaction the bump waits for commit, so readers can never cache
+    uncommitted data under the new version.
+    """
+    transaction.on_commit(lambda: _bump([VERSION_KEY.format(name) for name in collections]))
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _fresh_version(), timeout=None)
+
+
+def get_cached_user(user_id):
+    """Return (cached entry or None, version) for the authentication user cache
+
+    The version is read before the caller loads the row from the database, so
+    a row that was stale when loaded is stored under an already-bumped version.
+    """
+    [version] = _get_versions([USER_VERSION_KEY.format(user_id)])
+    return cache.get(USER_KEY.format(user_id, version)), version
+
+
+def cache_user(user_id, version, entry):
+    cache.set(USER_KEY.format(user_id, version), entry, settings.AUTH_USER_CACHE_TIMEOUT)
+
+
+def bump_user_version(*user_ids):
+    """Make cached copies of these users unreachable once the current transaction commits"""
+    transaction.on_commit(lambda: _bump([USER_VERSION_KEY.format(user_id) for user_id in user_ids]))
+
+
+def get_cached_profile(user_id):
+    """Return (profile data or None, version); read the version before building a missing profile"""
+    [version] = _get_versions([PROFILE_VERSION_KEY.format(user_id)])
+    return cache.get(PROFILE_KEY.format(user_id, version)), version
+
+
+def cache_profile(user_id, version, data):
+    cache.set(PROFILE_KEY.format(user_id, version), data, settings.PROFILE_CACHE_TIMEOUT)
+
+
+def bump_profile_version(*user_ids):
+    """Invalidate the cached profiles of these users once the current transaction commits"""
+    transaction.on_commit(lambda: _bump([PROFILE_VERSION_KEY.format(user_id) for user_id in user_ids]))
+
+
+def response_cache_stats():
+    """Hit/miss counters for this process"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def response_cache_key(request, collections):
+    versions = get_versions(collections)
+    digest = hashlib.sha256(request.get_full_path().encode()).hexdigest()
+    return RESPONSE_KEY.format('.'.join(f'{name}{version}' for name, version in zip(collections, versions)), digest)
+
+
+class VersionedCacheMixin:
+    """Cache anonymous GET responses of a view and bump its collections after writes"""
+    # Collections whose data appears in responses, and those a successful write changes
+    cache_collections = ()
+    cache_invalidates = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.response_cache_key = None
+        self.cached_headers = None
+        # Authentication has run; with no credentials JWT auth resolves to AnonymousUser without a query
+        if not self.cache_collections or request.method != 'GET' or request.user.is_authenticated:
+            return
+
+        key = response_cache_key(request, self.cache_collections)
+        cached = cache.get(key)
+        if cached is None:
+            _record('misses')
+            self.response_cache_key = key
+            return
+
+        _record('hits')
+        content, content_type, headers = cached
+        self.cached_headers = headers
+
+        def cached_response(*args, **kwargs):
+            response = HttpResponse(content, content_type=content_type)
+            for name, value in headers.items():
+                response[name] = value
+            response['X-Cache'] = 'HIT'
+            return response
+        # dispatch() looks the handler up after initial(), so this replaces list/retrieve
+        self.get = cached_response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, 'response_cache_key', None)
+        if key and response.status_code == 200:
+            def store(rendered):
+                headers = {name: rendered[name] for name in CACHED_HEADERS if rendered.has_header(name)}
+                cache.set(key, (rendered.content, rendered['Content-Type'], headers), settings.RESPONSE_CACHE_TIMEOUT)
+            response.add_post_render_callback(store)
+            response['X-Cache'] = 'MISS'
+        elif request.method not in permissions.SAFE_METHODS and response.status_code < 400:
+            bump_version(*self.cache_invalidates)
+        return response
@@ -0,0 +1,94 @@
+"""Conditional GET support (ETag / Last-Modified) for list and detail endpoints"""
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+from .cache import get_versions
+
+
+class ConditionalGetMixin:
+    """Answer matching If-None-Match / If-Modified-Since with 304 before serializing
+
+    Validators come from get_conditional_validators(), which returns a
+    (last_modified, fingerprint) pair computed with one aggregate query. The
+    weak ETag also folds in the request path, the caller and the response
+    cache versions, so writes that do not touch updated_at still change it.
+    With CONDITIONAL_VERSION_VALIDATORS, lists skip the aggregate and rely on
+    the versions alone, which every worker sees through the shared cache.
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def get_conditional_queryset(self):
+        """Filtered queryset without annotations, used to aggregate validators"""
+        raise NotImplementedError
+
+    def get_conditional_validators(self):
+        queryset = self.get_conditional_queryset()
+        if self.action == 'retrieve':
+            lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            try:
+                # Same coercion failures DRF's get_object_or_404 turns into a 404
+                queryset = queryset.filter(**{self.lookup_field: lookup})
+            except (TypeError, ValueError, ValidationError):
+                raise Http404
+        elif settings.CONDITIONAL_VERSION_VALIDATORS:
+            return None, None
+        row = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        return row['last_modified'], row['count']
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.conditional_headers = None
+        if request.method != 'GET' or getattr(self, 'action', 'list') not in self.conditional_actions:
+            return
+
+        # A response cache hit already carries validators that are valid for its cache key
+        headers = getattr(self, 'cached_headers', None)
+        if not headers or 'ETag' not in headers:
+            headers = self.compute_conditional_headers(request)
+        self.conditional_headers = headers
+
+        if self.is_not_modified(request, headers):
+            def not_modified(*args, **kwargs):
+                response = HttpResponseNotModified()
+                for name, value in headers.items():
+                    response[name] = value
+                return response
+            # dispatch() looks the handler up after initial(), so this replaces list/retrieve
+            self.get = not_modified
+
+    def compute_conditional_headers(self, request):
+        last_modified, fingerprint = self.get_conditional_validators()
+        parts = [request.get_full_path(), request.user.pk or 0, last_modified, fingerprint]
+        parts.extend(get_versions(getattr(self, 'cache_collections', ())))
+        digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+        headers = {'ETag': f'W/{quote_etag(digest)}'}
+        if last_modified is not None:
+            headers['Last-Modified'] = http_date(last_modified.timestamp())
+        return headers
+
+    def is_not_modified(self, request, headers):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            # Weak comparison, as RFC 9110 requires for If-None-Match
+            candidates = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+            return '*' in candidates or headers['ETag'].removeprefix('W/') in candidates
+        # A deletion leaves a collection's max(updated_at) unchanged, so lists revalidate by ETag only
+        if self.action != 'retrieve' or 'Last-Modified' not in headers:
+            return False
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        if if_modified_since is None:
+            return False
+        return parse_http_date_safe(headers['Last-Modified']) <= if_modified_since
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        headers = getattr(self, 'conditional_headers', None)
+        if headers and response.status_code == 200:
+            for name, value in headers.items():
+                response[name] = value
+        return response
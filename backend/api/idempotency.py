@@ -0,0 +1,79 @@
+"""Idempotency-Key support for POST actions that must not run twice
+
+A client that may retry (double-clicks, flaky networks) sends the same
+``Idempotency-Key`` header on every attempt. The first attempt claims the key
+in the cache; its response is stored under the key once the action finished,
+and later attempts with the same key get that response replayed without the
+action running again.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_KEY = 'idempotency:{}:{}'
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+
+# Placeholder stored while the first attempt is still running
+IN_PROGRESS = 'in-progress'
+
+
+def idempotency_cache_key(request, key):
+    # Keys are scoped to the caller and the endpoint, so reusing one elsewhere is harmless
+    digest = hashlib.sha256(f'{request.method}|{request.path}|{key}'.encode()).hexdigest()
+    return IDEMPOTENCY_KEY.format(request.user.pk, digest)
+
+
+class IdempotencyMixin:
+    """Replay the stored response of POST actions retried with the same Idempotency-Key"""
+    idempotent_actions = ()
+
+    def initial(self, request, *args, **kwargs):
+        # Runs after authentication and permission checks, so request.user is signed in
+        super().initial(request, *args, **kwargs)
+        self.idempotency_cache_key = None
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key or request.method != 'POST' or self.action not in self.idempotent_actions:
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            self.replace_handler(Response(
+                {'detail': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            ))
+            return
+
+        cache_key = idempotency_cache_key(request, key)
+        # add() is atomic, so only one of several concurrent attempts gets to run the action
+        if cache.add(cache_key, IN_PROGRESS, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            self.idempotency_cache_key = cache_key
+            return
+
+        stored = cache.get(cache_key)
+        if stored is None or stored == IN_PROGRESS:
+            self.replace_handler(Response(
+                {'detail': 'A request with this Idempotency-Key is still being processed'},
+                status=status.HTTP_409_CONFLICT
+            ))
+            return
+        status_code, data = stored
+        response = Response(data, status=status_code)
+        response['Idempotent-Replayed'] = 'true'
+        self.replace_handler(response)
+
+    def replace_handler(self, response):
+        # dispatch() looks the handler up after initial(), so this replaces the action
+        self.post = lambda *args, **kwargs: response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        cache_key = getattr(self, 'idempotency_cache_key', None)
+        if cache_key:
+            if response.status_code >= 500:
+                # Nothing was committed, so let the client retry with the same key
+                cache.delete(cache_key)
+            else:
+                cache.set(cache_key, (response.status_code, response.data), settings.IDEMPOTENCY_KEY_TTL)
+        return response
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.badges import BADGE_RULES, award_badges
+from api.models import User
+from api.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Evaluate every badge rule for every user and award the badges they are missing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # Rules read the UserStats counters, so make sure they exist and are right first
+        repaired = rebuild_user_stats(batch_size=batch_size)
+        self.stdout.write(f'Reconciled user stats ({repaired} rows repaired)')
+        created = award_badges(User.objects.all(), BADGE_RULES, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Awarded {created} badges'))
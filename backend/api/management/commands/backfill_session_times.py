@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.cache import bump_version
+from api.models import StudySession
+from api.schedule import parse_session_times
+
+
+class Command(BaseCommand):
+    help = 'Parse StudySession date/time strings into starts_at/ends_at'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-parse sessions that already have starts_at')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        sessions = StudySession.objects.order_by('pk').only('pk', 'date', 'time', 'created_at')
+        if not options['all']:
+            sessions = sessions.filter(starts_at__isnull=True)
+
+        updated = 0
+        unparsed = 0
+        batch = []
+        for session in sessions.iterator(chunk_size=batch_size):
+            starts_at, ends_at = parse_session_times(
+                session.date, session.time, timezone.localdate(session.created_at)
+            )
+            if starts_at is None:
+                unparsed += 1
+                self.stdout.write(self.style.WARNING(
+                    f'Could not parse session {session.pk}: {session.date!r} {session.time!r}'
+                ))
+                continue
+            session.starts_at = starts_at
+            session.ends_at = ends_at
+            batch.append(session)
+            if len(batch) >= batch_size:
+                updated += StudySession.objects.bulk_update(batch, ['starts_at', 'ends_at'])
+                batch = []
+        if batch:
+            updated += StudySession.objects.bulk_update(batch, ['starts_at', 'ends_at'])
+        if updated:
+            # bulk_update skips the save signals; cached ?from=/?to= lists depend on these columns
+            bump_version('sessions')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {updated} sessions ({unparsed} unparsed)'))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+from api.recommendations import CHUNK_SIZE, TOP_K, build
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored group and session recommendations for every user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K, help='Groups and sessions stored per user')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Users scored at a time')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = build(options['top_k'], options['chunk_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Stored {written} recommendations in {elapsed:.1f}s'))
@@ -0,0 +1,36 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.cache import bump_version
+from api.models import StudyGroup, StudySession
+from api.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for sessions and approved groups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.clear()
+
+        batch_size = options['batch_size']
+        sessions = StudySession.objects.only('title', 'course_code', 'description').order_by('pk')
+        groups = StudyGroup.objects.filter(status='approved').only(
+            'name', 'subject', 'description', 'status'
+        ).order_by('pk')
+
+        indexed = 0
+        for queryset in (sessions, groups):
+            instances = queryset.iterator(chunk_size=batch_size)
+            while batch := list(islice(instances, batch_size)):
+                # The index was just cleared, so every batch is a plain insert
+                backend.index_many(batch)
+                indexed += len(batch)
+        bump_version('sessions', 'groups')
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} sessions and groups'))
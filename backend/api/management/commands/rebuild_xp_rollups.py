@@ -0,0 +1,44 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from api.models import XPEvent, XPRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the day/week/month XP rollups from the XP event ledger'
+
+    TRUNCATORS = {
+        'day': TruncDay,
+        'week': TruncWeek,
+        'month': TruncMonth,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write('Clearing existing rollups...')
+        XPRollup.objects.all().delete()
+
+        for period, truncate in self.TRUNCATORS.items():
+            totals = XPEvent.objects.order_by().annotate(
+                bucket=truncate('created_at')
+            ).values('user_id', 'bucket').annotate(total=Sum('amount'))
+
+            rows = totals.iterator(chunk_size=batch_size)
+            rebuilt = 0
+            # Only one batch of rollups is held in memory at a time
+            while batch := [
+                XPRollup(user_id=row['user_id'], period=period, bucket_start=row['bucket'].date(), xp=row['total'])
+                for row in islice(rows, batch_size)
+            ]:
+                XPRollup.objects.bulk_create(batch)
+                rebuilt += len(batch)
+            self.stdout.write(f'Rebuilt {rebuilt} {period} rollups')
+
+        self.stdout.write(self.style.SUCCESS('Successfully rebuilt XP rollups!'))
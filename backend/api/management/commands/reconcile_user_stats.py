@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from api.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount UserStats from RSVPs, memberships, hosted sessions and created groups and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        repaired = rebuild_user_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reconciled user stats ({repaired} rows repaired)'))
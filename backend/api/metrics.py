@@ -0,0 +1,232 @@
+"""Per-request performance metrics: Server-Timing headers and Prometheus histograms
+
+PerformanceMiddleware times every request and records the latency in a
+per-route histogram. A sampled share of requests (METRICS_SAMPLE_RATE) also
+counts database queries and SQL time through a connection execute wrapper and
+serializer time through TimedSerializerMixin, and gets a Server-Timing header.
+The per-request state lives in a context variable, so queries the async views
+run on the ORM's thread are attributed to the right request.
+
+Histograms are kept per process; scrape every worker.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+from .cache import response_cache_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'sql_time', 'serializer_time', 'serializer_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_time += time.perf_counter() - started
+
+
+def install_query_recorder(connection, **kwargs):
+    # execute_wrappers lives on the per-thread connection object and survives reconnects
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+@contextmanager
+def serializer_timer():
+    """Add the enclosed time to the request's serializer time, counting nested serializers once"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    metrics.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_depth -= 1
+        if not metrics.serializer_depth:
+            metrics.serializer_time += time.perf_counter() - started
+
+
+class TimedSerializerMixin:
+    """Time building .data, for single objects and (through Meta.list_serializer_class) lists"""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = getattr(cls, 'Meta', None)
+        if meta is not None and not hasattr(meta, 'list_serializer_class'):
+            meta.list_serializer_class = TimedListSerializer
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class TimedListSerializer(serializers.ListSerializer):
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for idx, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[idx] += 1
+        self.total += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Histograms keyed by (metric name, route, method)"""
+    METRICS = {
+        'studysphere_request_duration_seconds': ('Total request time by route', LATENCY_BUCKETS),
+        'studysphere_request_sql_seconds': ('Time spent in SQL by route (sampled)', LATENCY_BUCKETS),
+        'studysphere_request_serializer_seconds': ('Time spent serializing by route (sampled)', LATENCY_BUCKETS),
+        'studysphere_request_queries': ('Database queries per request by route (sampled)', QUERY_BUCKETS),
+    }
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def observe(self, name, route, method, value):
+        key = (name, route, method)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.METRICS[name][1])
+            histogram.observe(value)
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+    def render(self):
+        """Prometheus text exposition format"""
+        with self.lock:
+            items = sorted(self.histograms.items())
+            snapshot = [(key, list(hist.counts), hist.total, hist.sum) for key, hist in items]
+        lines = []
+        for name, (description, buckets) in self.METRICS.items():
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} histogram')
+            for (metric, route, method), counts, total, value_sum in snapshot:
+                if metric != name:
+                    continue
+                labels = f'route="{escape_label(route)}",method="{method}"'
+                for bound, count in zip(buckets, counts):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {total}')
+                lines.append(f'{name}_sum{{{labels}}} {value_sum:.6f}')
+                lines.append(f'{name}_count{{{labels}}} {total}')
+
+        cache_stats = response_cache_stats()
+        lines.append('# HELP studysphere_response_cache_requests_total Anonymous response cache lookups')
+        lines.append('# TYPE studysphere_response_cache_requests_total counter')
+        for outcome in ('hits', 'misses'):
+            lines.append(f'studysphere_response_cache_requests_total{{outcome="{outcome}"}} {cache_stats[outcome]}')
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+class PerformanceMiddleware:
+    """Time requests into the registry and emit Server-Timing on sampled ones"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                _current.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    def start(self):
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            return None, None, time.perf_counter()
+        # Connections opened before this module was imported missed connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        metrics = RequestMetrics()
+        return metrics, _current.set(metrics), time.perf_counter()
+
+    def finish(self, request, response, metrics, started):
+        elapsed = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None else 'unmatched'
+        method = request.method
+
+        registry.observe('studysphere_request_duration_seconds', route, method, elapsed)
+        if metrics is not None:
+            registry.observe('studysphere_request_sql_seconds', route, method, metrics.sql_time)
+            registry.observe('studysphere_request_serializer_seconds', route, method, metrics.serializer_time)
+            registry.observe('studysphere_request_queries', route, method, metrics.queries)
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries"',
+                f'serializer;dur={metrics.serializer_time * 1000:.1f}',
+                f'view;dur={elapsed * 1000:.1f}',
+            ])
+        return response
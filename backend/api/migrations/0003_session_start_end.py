@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_xp_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studysession',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studysession',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
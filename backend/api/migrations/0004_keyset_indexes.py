@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_session_start_end'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studygroup',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='group_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studysession',
+            index=models.Index(fields=['-created_at', '-id'], name='session_created_idx'),
+        ),
+    ]
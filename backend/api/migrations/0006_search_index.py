@@ -0,0 +1,37 @@
+from django.db import migrations
+
+SQLITE_CREATE = (
+    "CREATE VIRTUAL TABLE search_index USING fts5("
+    "kind UNINDEXED, object_id UNINDEXED, title, code, body, tokenize='porter unicode61')"
+)
+
+POSTGRES_CREATE = [
+    "CREATE TABLE search_index ("
+    "id bigint PRIMARY KEY, kind varchar(20) NOT NULL, object_id bigint NOT NULL, document tsvector NOT NULL)",
+    "CREATE INDEX search_index_document_idx ON search_index USING GIN (document)",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_CREATE)
+    elif vendor == 'postgresql':
+        for statement in POSTGRES_CREATE:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE IF EXISTS search_index')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_user_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
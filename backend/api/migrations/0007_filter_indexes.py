@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studygroup',
+            index=models.Index(fields=['subject', 'status', '-created_at', '-id'], name='group_subject_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studysession',
+            index=models.Index(fields=['course_code', '-created_at', '-id'], name='session_course_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studysession',
+            index=models.Index(fields=['host', '-created_at', '-id'], name='session_host_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-xp', 'id'], name='user_xp_idx'),
+        ),
+    ]
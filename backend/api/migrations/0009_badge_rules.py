@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:17
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_groups_created(apps, schema_editor):
+    UserStats = apps.get_model('api', 'UserStats')
+    StudyGroup = apps.get_model('api', 'StudyGroup')
+    created = StudyGroup.objects.filter(creator=OuterRef('user')).order_by().values('creator').annotate(
+        count=Count('*')
+    ).values('count')
+    UserStats.objects.update(groups_created=Coalesce(Subquery(created), 0))
+
+
+def drop_duplicate_badges(apps, schema_editor):
+    # Keep the first of each user's badges of the same name
+    Badge = apps.get_model('api', 'Badge')
+    keep = Badge.objects.values('user', 'name').annotate(first=Min('id')).values('first')
+    Badge.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_user_xp_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='groups_created',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_groups_created, migrations.RunPython.noop),
+        migrations.RunPython(drop_duplicate_badges, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='badge',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='badge_user_name_unique'),
+        ),
+    ]
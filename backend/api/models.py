@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
@@ -13,11 +15,48 @@ class User(AbstractUser):
 
     class Meta:
         db_table = 'users'
+        indexes = [
+            # All-time leaderboard order, and the rank COUNTs above a given XP
+            models.Index(fields=['-xp', 'id'], name='user_xp_idx'),
+        ]
 
     def __str__(self):
         return self.username
 
 
+class StudyGroupQuerySet(models.QuerySet):
+    """QuerySet helpers for study group listings"""
+
+    MEMBER_PREVIEW_SIZE = 3
+
+    def with_membership(self, user=None):
+        """Annotate members_count and is_member as correlated subqueries"""
+        member_count = GroupMembership.objects.filter(
+            group=OuterRef('pk')
+        ).order_by().values('group').annotate(count=Count('*')).values('count')
+
+        if user is not None and user.is_authenticated:
+            is_member = Exists(GroupMembership.objects.filter(group=OuterRef('pk'), user=user))
+        else:
+            is_member = Value(False, output_field=models.BooleanField())
+
+        return self.annotate(
+            members_count=Coalesce(Subquery(member_count), 0),
+            is_member=is_member,
+        )
+
+    def with_member_preview(self):
+        """Prefetch the earliest memberships of each group into member_preview"""
+        # A sliced Prefetch is evaluated with a ROW_NUMBER() window per group,
+        # so large groups never load their full member list.
+        memberships = GroupMembership.objects.select_related('user').only(
+            'group_id', 'user__username', 'user__image'
+        ).order_by('joined_at', 'id')[:self.MEMBER_PREVIEW_SIZE]
+        return self.prefetch_related(
+            Prefetch('groupmembership_set', queryset=memberships, to_attr='member_preview')
+        )
+
+
 class StudyGroup(models.Model):
     """Study groups for collaborative learning"""
     STATUS_CHOICES = [
@@ -35,14 +74,42 @@ class StudyGroup(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = StudyGroupQuerySet.as_manager()
+
     class Meta:
         db_table = 'study_groups'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the approved/pending/rejected lists
+            models.Index(fields=['status', '-created_at', '-id'], name='group_status_created_idx'),
+            # ?subject= filtering within the approved list
+            models.Index(fields=['subject', 'status', '-created_at', '-id'], name='group_subject_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class StudySessionQuerySet(models.QuerySet):
+    """QuerySet helpers for study session listings"""
+
+    def with_attendance(self, user=None):
+        """Annotate attendees_count and is_attending as correlated subqueries"""
+        rsvp_count = SessionRSVP.objects.filter(
+            session=OuterRef('pk')
+        ).order_by().values('session').annotate(count=Count('*')).values('count')
+
+        if user is not None and user.is_authenticated:
+            is_attending = Exists(SessionRSVP.objects.filter(session=OuterRef('pk'), user=user))
+        else:
+            is_attending = Value(False, output_field=models.BooleanField())
+
+        return self.annotate(
+            attendees_count=Coalesce(Subquery(rsvp_count), 0),
+            is_attending=is_attending,
+        )
+
+
 class StudySession(models.Model):
     """Study sessions organized by users"""
     title = models.CharField(max_length=200)
@@ -50,6 +117,8 @@ class StudySession(models.Model):
     description = models.TextField()
     date = models.CharField(max_length=100)  # Store as string for flexibility
     time = models.CharField(max_length=100)  # Store as string like "8:00 AM - 10:00 AM"
+    starts_at = models.DateTimeField(null=True, blank=True, db_index=True)  # Parsed from date/time
+    ends_at = models.DateTimeField(null=True, blank=True, db_index=True)
     location = models.CharField(max_length=200)
     host = models.ForeignKey(User, on_delete=models.CASCADE, related_name='hosted_sessions')
     group = models.ForeignKey(StudyGroup, on_delete=models.SET_NULL, null=True, blank=True, related_name='sessions')
@@ -57,9 +126,18 @@ class StudySession(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = StudySessionQuerySet.as_manager()
+
     class Meta:
         db_table = 'study_sessions'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination and the default newest-first ordering
+            models.Index(fields=['-created_at', '-id'], name='session_created_idx'),
+            # ?course_code= and ?host= filtering, already in list order
+            models.Index(fields=['course_code', '-created_at', '-id'], name='session_course_idx'),
+            models.Index(fields=['host', '-created_at', '-id'], name='session_host_idx'),
+        ]
 
     def __str__(self):
         return f"{self.course_code} - {self.title}"
@@ -105,6 +183,105 @@ class Badge(models.Model):
     class Meta:
         db_table = 'badges'
         ordering = ['-earned_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='badge_user_name_unique'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.name}"
+
+
+class XPEvent(models.Model):
+    """Append-only ledger of every XP award"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='xp_events')
+    amount = models.IntegerField()
+    reason = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'xp_events'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='xp_event_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} +{self.amount} ({self.reason})"
+
+
+class XPRollup(models.Model):
+    """Per-user XP totals for a calendar day, week or month, maintained by award_xp"""
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='xp_rollups')
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    bucket_start = models.DateField()
+    xp = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'xp_rollups'
+        unique_together = ['user', 'period', 'bucket_start']
+        indexes = [
+            models.Index(fields=['period', 'bucket_start', '-xp'], name='xp_rollup_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} {self.period} {self.bucket_start}: {self.xp}"
+
+
+class UserStats(models.Model):
+    """Denormalized activity counters shown on the dashboard"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    sessions_attended = models.IntegerField(default=0)
+    groups_joined = models.IntegerField(default=0)
+    sessions_hosted = models.IntegerField(default=0)
+    groups_created = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'user_stats'
+        verbose_name_plural = 'user stats'
+
+    def __str__(self):
+        return f"{self.user.username} stats"
+
+
+class RecommendationQuerySet(models.QuerySet):
+    """QuerySet helpers for serving precomputed recommendations"""
+
+    def for_user(self, user):
+        """A user's recommendations, best first, minus what has gone stale since they were built"""
+        joined = GroupMembership.objects.filter(user=user, group=OuterRef('group'))
+        attending = SessionRSVP.objects.filter(user=user, session=OuterRef('session'))
+        live_group = Q(group__status='approved') & ~Exists(joined)
+        live_session = (
+            Q(session__starts_at__gte=timezone.now()) | Q(session__isnull=False, session__starts_at__isnull=True)
+        ) & ~Exists(attending)
+        return self.filter(live_group | live_session, user=user).select_related('group', 'session').order_by('rank')
+
+
+class Recommendation(models.Model):
+    """A group or session suggested to a user, rebuilt offline by build_recommendations"""
+    # Covered by recommendation_user_idx
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recommendations', db_index=False)
+    # Exactly one of group and session is set
+    group = models.ForeignKey(StudyGroup, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    session = models.ForeignKey(StudySession, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()  # 1-based, among the user's groups or sessions
+
+    objects = RecommendationQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'recommendations'
+        indexes = [
+            # The whole read path: one user's rows in rank order
+            models.Index(fields=['user', 'rank'], name='recommendation_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} #{self.rank}: {self.group or self.session}"
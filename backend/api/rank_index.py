@@ -0,0 +1,194 @@
+"""In-process order-statistics index over User.xp
+
+Every user's XP is kept in one sorted array, so the rank of any XP (1 + the
+users with more) and that rank as a percentage of all users cost a bisect
+instead of a COUNT over the users table. Changes are applied as they commit:
+award_xp adds to the awarded users' entries and the user signals set or drop
+entries for saved and deleted users. Each user's current XP, needed to find
+their old entry, is kept in two more machine-integer arrays ordered by user
+id, so the index costs 24 bytes per user and no Python object per user.
+Inserting into the arrays moves memory linearly, but that is a memmove of
+machine integers, far cheaper than the lookups it replaces.
+
+The index is per process and is loaded on first use. XP changed by other
+processes or by raw SQL shows up when it is reloaded from the database: the
+first lookup after RANK_INDEX_RECONCILE_INTERVAL seconds starts a reload in a
+background thread and keeps answering from the current arrays meanwhile.
+Changes applied while a reload reads the table are replayed onto the new
+arrays before they are swapped in, so none are lost; an award committed just
+as the read starts may count twice until the next reload.
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import User
+
+
+class RankIndex:
+    """Sorted XP of every user, with each user's current entry"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Held for a whole reload, so reloads never interleave
+        self.reconcile_lock = threading.Lock()
+        self.refresh_thread = None
+        self.reset()
+
+    def reset(self):
+        """Forget everything; the next lookup loads from the database"""
+        with self.lock:
+            self.scores = array('q')
+            self.ids = array('q')
+            self.xps = array('q')
+            self.loaded_at = None
+            self.journal = None
+
+    def load(self):
+        """(ids, xps) arrays of every user, ordered by id"""
+        ids, xps = array('q'), array('q')
+        for pk, xp in User.objects.order_by('pk').values_list('pk', 'xp').iterator(chunk_size=10000):
+            ids.append(pk)
+            xps.append(xp)
+        return ids, xps
+
+    def reconcile(self):
+        """Reload from the database; returns how many users' XP had drifted"""
+        with self.reconcile_lock:
+            with self.lock:
+                self.journal = []
+            try:
+                ids, xps = self.load()
+            except BaseException:
+                with self.lock:
+                    self.journal = None
+                raise
+            scores = array('q', sorted(xps))
+            with self.lock:
+                old_ids, old_xps, was_loaded = self.ids, self.xps, self.loaded_at is not None
+                journal, self.journal = self.journal, None
+                self.scores, self.ids, self.xps, self.loaded_at = scores, ids, xps, time.monotonic()
+                for apply, args in journal:
+                    apply(*args)
+                return drift(old_ids, old_xps, self.ids, self.xps) if was_loaded else 0
+
+    def ensure_fresh(self):
+        """Load the index if it is missing; reload it in the background once it is older than the interval"""
+        loaded_at = self.loaded_at
+        if loaded_at is None:
+            self.reconcile()
+        elif time.monotonic() - loaded_at >= settings.RANK_INDEX_RECONCILE_INTERVAL:
+            self.refresh()
+
+    def refresh(self):
+        """Start a background reload unless one is running; returns its thread"""
+        with self.lock:
+            if self.refresh_thread is None or not self.refresh_thread.is_alive():
+                self.refresh_thread = threading.Thread(target=self._refresh, name='rank-index-refresh', daemon=True)
+                self.refresh_thread.start()
+            return self.refresh_thread
+
+    def _refresh(self):
+        try:
+            self.reconcile()
+        finally:
+            connections.close_all()
+
+    def standing(self, xp):
+        """{'rank': users with more XP + 1, 'percentile': rank as a percentage of all users}"""
+        self.ensure_fresh()
+        with self.lock:
+            total = len(self.scores)
+            rank = total - bisect_right(self.scores, xp) + 1
+        if not total:
+            return {'rank': 1, 'percentile': 100.0}
+        # Reads as "top N%": the leader of 1000 users is in the top 0.1%
+        return {'rank': rank, 'percentile': round(min(rank, total) * 100 / total, 1)}
+
+    def _find(self, user_id):
+        """Position of user_id in ids, or None"""
+        idx = bisect_left(self.ids, user_id)
+        return idx if idx < len(self.ids) and self.ids[idx] == user_id else None
+
+    def _set(self, user_id, xp):
+        idx = self._find(user_id)
+        if idx is None:
+            idx = bisect_left(self.ids, user_id)
+            self.ids.insert(idx, user_id)
+            self.xps.insert(idx, xp)
+        elif self.xps[idx] == xp:
+            return
+        else:
+            del self.scores[bisect_left(self.scores, self.xps[idx])]
+            self.xps[idx] = xp
+        insort(self.scores, xp)
+
+    def _add(self, user_ids, amount):
+        for user_id in user_ids:
+            idx = self._find(user_id)
+            if idx is not None:
+                self._set(user_id, self.xps[idx] + amount)
+
+    def _remove(self, user_id):
+        idx = self._find(user_id)
+        if idx is not None:
+            del self.scores[bisect_left(self.scores, self.xps[idx])]
+            del self.ids[idx]
+            del self.xps[idx]
+
+    def _apply(self, change, *args):
+        # A reload in progress replays the change onto the arrays it is building
+        if self.journal is not None:
+            self.journal.append((change, args))
+        if self.loaded_at is not None:
+            change(*args)
+
+    def set(self, user_id, xp):
+        with self.lock:
+            self._apply(self._set, user_id, xp)
+
+    def add(self, user_ids, amount):
+        """Add XP to users already in the index; others are picked up by the next reconcile"""
+        with self.lock:
+            self._apply(self._add, list(user_ids), amount)
+
+    def remove(self, user_id):
+        with self.lock:
+            self._apply(self._remove, user_id)
+
+
+def drift(old_ids, old_xps, new_ids, new_xps):
+    """Users missing from either side or with different XP, walking both id-ordered arrays together"""
+    drifted = i = j = 0
+    while i < len(old_ids) or j < len(new_ids):
+        if j == len(new_ids) or (i < len(old_ids) and old_ids[i] < new_ids[j]):
+            drifted += 1
+            i += 1
+        elif i == len(old_ids) or new_ids[j] < old_ids[i]:
+            drifted += 1
+            j += 1
+        else:
+            drifted += old_xps[i] != new_xps[j]
+            i += 1
+            j += 1
+    return drifted
+
+
+rank_index = RankIndex()
+
+
+def xp_awarded(user_ids, amount):
+    """Apply an XP award to the index once the current transaction commits"""
+    transaction.on_commit(lambda: rank_index.add(user_ids, amount))
+
+
+def user_saved(user_id, xp):
+    transaction.on_commit(lambda: rank_index.set(user_id, xp))
+
+
+def user_deleted(user_id):
+    transaction.on_commit(lambda: rank_index.remove(user_id))
@@ -0,0 +1,58 @@
+"""Leaderboard ranking queries
+
+Rankings order rows by XP descending with ties broken by user id, and rank
+them with SQL RANK() (tied users share a rank). The window always runs over
+the handful of rows being returned, never the whole table: ranks within a
+contiguous slice of the ordering only need an offset from one COUNT on the
+XP index above the slice.
+"""
+from django.db.models import Count, F, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Rank
+
+from .models import Badge
+
+DEFAULT_BADGE = 'Rising Star'
+
+
+def latest_badge(user_ref='pk'):
+    """Subquery for the name of a user's most recent badge"""
+    return Subquery(
+        Badge.objects.filter(user=OuterRef(user_ref)).order_by('-earned_at', '-id').values('name')[:1]
+    )
+
+
+def ranked(queryset, pks, annotations):
+    """The rows of queryset with these primary keys, annotated with their RANK() among themselves"""
+    return queryset.filter(pk__in=pks).annotate(
+        rank=Window(Rank(), order_by=F('xp').desc()), **annotations
+    )
+
+
+def top(queryset, tie_field, size, **annotations):
+    """Lazy queryset of the first size rows, ranked
+
+    Nothing ranks above the top slice, so ranks within it are already global.
+    """
+    pks = queryset.order_by('-xp', tie_field).values('pk')[:size]
+    return ranked(queryset, Subquery(pks), annotations).order_by('-xp', tie_field)
+
+
+def around(queryset, tie_field, entry, size, **annotations):
+    """Up to size rows either side of entry (a row of queryset) and entry itself, with global ranks"""
+    xp, tie = entry.xp, getattr(entry, tie_field)
+    above = queryset.filter(Q(xp__gt=xp) | Q(xp=xp, **{f'{tie_field}__lt': tie})).order_by('xp', f'-{tie_field}')
+    below = queryset.filter(Q(xp__lt=xp) | Q(xp=xp, **{f'{tie_field}__gt': tie})).order_by('-xp', tie_field)
+    pks = [entry.pk, *above.values_list('pk', flat=True)[:size], *below.values_list('pk', flat=True)[:size]]
+    rows = list(ranked(queryset, pks, annotations).order_by('-xp', tie_field))
+
+    # Rows tied with the top of the slice share its global rank. The slice is
+    # contiguous, so a row with less XP is outranked by everyone at or above the
+    # top XP plus the slice rows between: its local rank minus the tied rows.
+    top_xp = rows[0].xp
+    counts = queryset.filter(xp__gte=top_xp).aggregate(
+        above=Count('pk', filter=Q(xp__gt=top_xp)), through=Count('pk')
+    )
+    tied = sum(1 for row in rows if row.xp == top_xp)
+    for row in rows:
+        row.rank = counts['above'] + 1 if row.xp == top_xp else counts['through'] + row.rank - tied
+    return rows
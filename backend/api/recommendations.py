@@ -0,0 +1,174 @@
+"""Offline group and session recommendations from co-membership data
+
+Every membership of an approved group and every RSVP goes into one sparse
+users x items matrix M, where items are groups and sessions. Two items are
+similar when the same users hold both: C = N MᵀM N, the cosine of their user
+columns, with the diagonal dropped. A user's collaborative scores are their row
+of M·C. Each candidate that scores also gets COURSE_WEIGHT times the share of
+the user's own items in its course code or subject.
+
+Items the user already holds, groups that are not approved and sessions that
+have started are never candidates. The best ``top_k`` groups and sessions per
+user are stored as Recommendation rows, so serving them is one indexed read.
+Users are scored a chunk at a time, so memory follows the chunk size, not the
+user count.
+"""
+from itertools import chain, islice
+
+import numpy as np
+from scipy import sparse
+from django.db import transaction
+from django.utils import timezone
+
+from .models import GroupMembership, Recommendation, SessionRSVP, StudyGroup, StudySession
+
+COURSE_WEIGHT = 0.5
+TOP_K = 10
+CHUNK_SIZE = 10000
+
+
+def id_pairs(queryset, *fields):
+    """Two integer columns of a queryset as an (n, 2) array, without building row tuples"""
+    rows = queryset.order_by().values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+    return np.fromiter(chain.from_iterable(rows), dtype=np.int64).reshape(-1, 2)
+
+
+class ItemSpace:
+    """Column numbering of groups then sessions, with each item's course and eligibility"""
+
+    def __init__(self, now):
+        groups = list(StudyGroup.objects.filter(status='approved').order_by('pk').values_list('pk', 'subject'))
+        sessions = list(StudySession.objects.order_by('pk').values_list('pk', 'course_code', 'starts_at'))
+        self.group_ids = np.array([pk for pk, _ in groups], dtype=np.int64)
+        self.session_ids = np.array([pk for pk, _, _ in sessions], dtype=np.int64)
+        self.group_count = len(groups)
+        self.size = len(groups) + len(sessions)
+
+        courses = [subject for _, subject in groups] + [code for _, code, _ in sessions]
+        _, self.course = np.unique(np.array(courses, dtype=object), return_inverse=True)
+        self.course_count = int(self.course.max()) + 1 if self.size else 0
+        # Past sessions still say which users go together, but are never suggested
+        self.eligible = np.array(
+            [True] * len(groups) + [starts_at is None or starts_at >= now for _, _, starts_at in sessions]
+        )
+
+    def columns(self, ids, known):
+        """Column of each id in known (sorted), or -1 for ids that are not items"""
+        found = np.searchsorted(known, ids)
+        found[found == len(known)] = 0
+        return np.where(known[found] == ids if len(known) else False, found, -1)
+
+    @property
+    def pks(self):
+        return np.concatenate([self.group_ids, self.session_ids])
+
+
+def user_item_matrix(items):
+    """(user ids, M): one row per user holding any item"""
+    memberships = id_pairs(GroupMembership.objects.filter(group__status='approved'), 'user_id', 'group_id')
+    rsvps = id_pairs(SessionRSVP.objects.all(), 'user_id', 'session_id')
+    group_cols = items.columns(memberships[:, 1], items.group_ids)
+    session_cols = items.columns(rsvps[:, 1], items.session_ids)
+    session_cols[session_cols >= 0] += items.group_count
+
+    users = np.concatenate([memberships[:, 0], rsvps[:, 0]])
+    cols = np.concatenate([group_cols, session_cols])
+    users, cols = users[cols >= 0], cols[cols >= 0]
+    user_ids, rows = np.unique(users, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(len(user_ids), items.size)
+    )
+    return user_ids, matrix
+
+
+def similarity(matrix, eligible):
+    """Cosine similarity of item columns, with only eligible items as targets"""
+    degree = np.asarray(matrix.sum(axis=0)).ravel()
+    inverse_norm = np.divide(1.0, np.sqrt(degree), out=np.zeros_like(degree), where=degree > 0)
+    normalized = matrix @ sparse.diags(inverse_norm)
+    cooccurrence = (normalized.T @ normalized).tocsr()
+    cooccurrence.setdiag(0)
+    cooccurrence = cooccurrence @ sparse.diags(eligible.astype(float))
+    cooccurrence.eliminate_zeros()
+    return cooccurrence.tocsr()
+
+
+def lookup(matrix, rows, cols):
+    """matrix[rows[i], cols[i]] for every i, with 0 where the entry is absent"""
+    matrix = matrix.tocoo()
+    width = matrix.shape[1]
+    keys = matrix.row.astype(np.int64) * width + matrix.col
+    order = np.argsort(keys)
+    keys, values = keys[order], matrix.data[order]
+    wanted = rows.astype(np.int64) * width + cols
+    found = np.searchsorted(keys, wanted)
+    found[found == len(keys)] = 0
+    return np.where(keys[found] == wanted if len(keys) else False, values[found], 0.0)
+
+
+def top_per_user(scores, kind, top_k):
+    """(rows, cols, values, ranks) of the top_k entries of each row of each kind"""
+    groups = scores.row.astype(np.int64) * 2 + kind[scores.col]
+    # One sort on (row, kind, score descending): scores are positive and below
+    # span, so each (row, kind) group owns the key range [group * span, (group + 1) * span)
+    span = scores.data.max() + 1
+    order = np.argsort(groups * span + (span - 1 - scores.data))
+    rows, cols, values, groups = scores.row[order], scores.col[order], scores.data[order], groups[order]
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    ranks = np.arange(len(groups)) - np.repeat(starts, np.diff(np.r_[starts, len(groups)])) + 1
+    keep = ranks <= top_k
+    return rows[keep], cols[keep], values[keep], ranks[keep]
+
+
+def recommend(top_k=TOP_K, chunk_size=CHUNK_SIZE, now=None):
+    """Yield (user_id, group_id, session_id, score, rank) rows for every user with any items"""
+    items = ItemSpace(now or timezone.now())
+    user_ids, matrix = user_item_matrix(items)
+    if not matrix.nnz:
+        return
+    similar = similarity(matrix, items.eligible)
+    kind = (np.arange(items.size) >= items.group_count).astype(np.int64)
+    item_pks = items.pks
+
+    # Share of each user's items in each course
+    courses = sparse.csr_matrix(
+        (np.ones(items.size), (np.arange(items.size), items.course)), shape=(items.size, items.course_count)
+    )
+    held = np.asarray(matrix.sum(axis=1)).ravel()
+    affinity = sparse.diags(1.0 / held) @ (matrix @ courses)
+
+    for start in range(0, matrix.shape[0], chunk_size):
+        chunk = matrix[start:start + chunk_size]
+        scores = (chunk @ similar).tocsr()
+        # Drop what the user already holds
+        scores = (scores - scores.multiply(chunk)).tocoo()
+        scores.eliminate_zeros()
+        if not scores.nnz:
+            continue
+        boost = lookup(affinity[start:start + chunk_size], scores.row, items.course[scores.col])
+        scores.data = scores.data + COURSE_WEIGHT * boost
+
+        rows, cols, values, ranks = top_per_user(scores, kind, top_k)
+        is_group = (cols < items.group_count).tolist()
+        for user_id, pk, group, score, rank in zip(
+            user_ids[start + rows].tolist(), item_pks[cols].tolist(), is_group, values.tolist(), ranks.tolist()
+        ):
+            yield (user_id, pk, None, score, rank) if group else (user_id, None, pk, score, rank)
+
+
+@transaction.atomic
+def build(top_k=TOP_K, chunk_size=CHUNK_SIZE):
+    """Replace every stored recommendation; returns the number of rows written
+
+    Readers keep seeing the previous set until the new one commits.
+    """
+    Recommendation.objects.all().delete()
+    rows = recommend(top_k, chunk_size)
+    written = 0
+    while batch := [
+        Recommendation(user_id=user_id, group_id=group_id, session_id=session_id, score=score, rank=rank)
+        for user_id, group_id, session_id, score, rank in islice(rows, chunk_size)
+    ]:
+        Recommendation.objects.bulk_create(batch)
+        written += len(batch)
+    return written
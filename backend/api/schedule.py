@@ -0,0 +1,83 @@
+"""Parsing of the free-text StudySession date and time strings"""
+import re
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%B %d %Y', '%b %d %Y', '%d %B %Y', '%d %b %Y']
+YEARLESS_DATE_FORMATS = ['%B %d', '%b %d', '%d %B', '%d %b']
+TIME_FORMATS = ['%I:%M %p', '%I %p', '%I:%M%p', '%I%p', '%H:%M', '%H:%M:%S']
+
+WEEKDAY_PREFIX = re.compile(r'^(mon|tue|wed|thu|fri|sat|sun)[a-z]*,?\s+', re.IGNORECASE)
+ORDINAL_SUFFIX = re.compile(r'(\d+)(st|nd|rd|th)\b', re.IGNORECASE)
+TIME_RANGE_SEPARATOR = re.compile(r'\s*(?:-|–|—|\bto\b)\s*', re.IGNORECASE)
+
+
+def parse_session_date(value, reference):
+    """Parse strings like "Wednesday, October 22nd" or "2025-10-22" into a date
+
+    Dates without a year take the year of the reference date, or the next one
+    if that would put the session more than six months in the past.
+    """
+    text = ORDINAL_SUFFIX.sub(r'\1', WEEKDAY_PREFIX.sub('', value.strip())).replace(',', ' ')
+    text = ' '.join(text.split())
+
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+
+    for fmt in YEARLESS_DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(f'{text} {reference.year}', f'{fmt} %Y').date()
+        except ValueError:
+            continue
+        if parsed < reference - timedelta(days=183):
+            parsed = parsed.replace(year=parsed.year + 1)
+        return parsed
+    return None
+
+
+def parse_clock_time(value):
+    """Parse "8:00 AM", "8 pm" or "14:30" into a time"""
+    text = ' '.join(value.strip().upper().replace('.', '').split())
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_session_times(date_value, time_value, reference=None):
+    """Return aware (starts_at, ends_at) datetimes for a session, or None for unparseable parts"""
+    reference = reference or timezone.localdate()
+    day = parse_session_date(date_value or '', reference)
+    if day is None:
+        return None, None
+
+    parts = TIME_RANGE_SEPARATOR.split((time_value or '').strip(), maxsplit=1)
+    start_time = parse_clock_time(parts[0]) if parts[0] else None
+    end_time = parse_clock_time(parts[1]) if len(parts) > 1 else None
+
+    tz = timezone.get_current_timezone()
+    starts_at = timezone.make_aware(datetime.combine(day, start_time or time.min), tz)
+    ends_at = None
+    if start_time and end_time:
+        ends_at = timezone.make_aware(datetime.combine(day, end_time), tz)
+        if ends_at <= starts_at:
+            # Sessions that run past midnight
+            ends_at += timedelta(days=1)
+    return starts_at, ends_at
+
+
+def fill_session_times(attrs, instance=None):
+    """Derive starts_at/ends_at for validated session data whose date or time changed"""
+    if 'starts_at' in attrs or not ('date' in attrs or 'time' in attrs):
+        return attrs
+    date_value = attrs.get('date', instance.date if instance else '')
+    time_value = attrs.get('time', instance.time if instance else '')
+    reference = timezone.localdate(instance.created_at) if instance else None
+    attrs['starts_at'], attrs['ends_at'] = parse_session_times(date_value, time_value, reference)
+    return attrs
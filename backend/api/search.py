@@ -0,0 +1,220 @@
+"""Pluggable full-text search over study sessions and groups
+
+The index lives in a ``search_index`` table created by migration 0006: an FTS5
+virtual table on SQLite and a tsvector column with a GIN index on PostgreSQL.
+Each indexed object is one row keyed by a document id derived from its kind
+and primary key, so writes replace a single row by primary key.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from .models import StudyGroup, StudySession
+
+KINDS = {
+    'session': 0,
+    'group': 1,
+}
+
+TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def document_id(kind, object_id):
+    return object_id * len(KINDS) + KINDS[kind]
+
+
+def object_kind(instance):
+    if isinstance(instance, StudySession):
+        return 'session'
+    if isinstance(instance, StudyGroup):
+        return 'group'
+    raise TypeError(f'{type(instance).__name__} is not searchable')
+
+
+def search_fields(instance):
+    """Return (title, code, body) for an indexable object, or None if it should not be indexed"""
+    if isinstance(instance, StudySession):
+        return instance.title, instance.course_code, instance.description
+    # Only approved groups are visible to everyone, so only they are searchable
+    if instance.status != 'approved':
+        return None
+    return instance.name, instance.subject, instance.description
+
+
+def query_tokens(query):
+    return TOKEN.findall(query.lower())[:10]
+
+
+class SQLiteFTSBackend:
+    """SQLite FTS5 with bm25 ranking (title weighted over code over description)"""
+
+    def index(self, instance):
+        kind = object_kind(instance)
+        fields = search_fields(instance)
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM search_index WHERE rowid = %s', [document_id(kind, instance.pk)])
+            if fields is not None:
+                cursor.execute(
+                    'INSERT INTO search_index (rowid, kind, object_id, title, code, body) '
+                    'VALUES (%s, %s, %s, %s, %s, %s)',
+                    [document_id(kind, instance.pk), kind, instance.pk, *fields]
+                )
+
+    def index_many(self, instances):
+        """Add documents that are not in the index yet, e.g. right after clear()"""
+        rows = []
+        for instance in instances:
+            fields = search_fields(instance)
+            if fields is not None:
+                kind = object_kind(instance)
+                rows.append([document_id(kind, instance.pk), kind, instance.pk, *fields])
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO search_index (rowid, kind, object_id, title, code, body) VALUES (%s, %s, %s, %s, %s, %s)',
+                rows
+            )
+
+    def remove(self, kind, object_id):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM search_index WHERE rowid = %s', [document_id(kind, object_id)])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM search_index')
+
+    def _match(self, tokens, kind):
+        # Quote every token so user input can never be parsed as FTS5 query syntax
+        expression = ' '.join(f'"{token}"*' for token in tokens)
+        where = 'search_index MATCH %s'
+        params = [expression]
+        if kind:
+            where += ' AND kind = %s'
+            params.append(kind)
+        return where, params
+
+    def count(self, tokens, kind=None):
+        where, params = self._match(tokens, kind)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM search_index WHERE {where}', params)
+            return cursor.fetchone()[0]
+
+    def search(self, tokens, kind=None, offset=0, limit=20):
+        where, params = self._match(tokens, kind)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT kind, object_id, -bm25(search_index, 0, 0, 10.0, 5.0, 1.0) AS score '
+                f'FROM search_index WHERE {where} ORDER BY score DESC, rowid LIMIT %s OFFSET %s',
+                params + [limit, offset]
+            )
+            return cursor.fetchall()
+
+
+class PostgresSearchBackend:
+    """PostgreSQL tsvector with a GIN index and ts_rank ranking"""
+    config = 'english'
+
+    upsert = (
+        'INSERT INTO search_index (id, kind, object_id, document) VALUES (%s, %s, %s, '
+        "setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+        "setweight(to_tsvector(%s::regconfig, %s), 'B') || "
+        "setweight(to_tsvector(%s::regconfig, %s), 'C')) "
+        'ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document'
+    )
+
+    def _params(self, kind, instance, fields):
+        return [document_id(kind, instance.pk), kind, instance.pk,
+                self.config, fields[0], self.config, fields[1], self.config, fields[2]]
+
+    def index(self, instance):
+        kind = object_kind(instance)
+        fields = search_fields(instance)
+        if fields is None:
+            self.remove(kind, instance.pk)
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(self.upsert, self._params(kind, instance, fields))
+
+    def index_many(self, instances):
+        """Add or replace the documents of many objects"""
+        rows = []
+        for instance in instances:
+            fields = search_fields(instance)
+            if fields is not None:
+                rows.append(self._params(object_kind(instance), instance, fields))
+        with connection.cursor() as cursor:
+            cursor.executemany(self.upsert, rows)
+
+    def remove(self, kind, object_id):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM search_index WHERE id = %s', [document_id(kind, object_id)])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute('TRUNCATE search_index')
+
+    def _match(self, tokens, kind):
+        # Tokens are \w+ only, so the prefix tsquery below cannot be malformed
+        expression = ' & '.join(f'{token}:*' for token in tokens)
+        where = 'document @@ to_tsquery(%s::regconfig, %s)'
+        params = [self.config, expression]
+        if kind:
+            where += ' AND kind = %s'
+            params.append(kind)
+        return where, params
+
+    def count(self, tokens, kind=None):
+        where, params = self._match(tokens, kind)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM search_index WHERE {where}', params)
+            return cursor.fetchone()[0]
+
+    def search(self, tokens, kind=None, offset=0, limit=20):
+        where, params = self._match(tokens, kind)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT kind, object_id, ts_rank(document, to_tsquery(%s::regconfig, %s)) AS score '
+                f'FROM search_index WHERE {where} ORDER BY score DESC, id LIMIT %s OFFSET %s',
+                [self.config, params[1]] + params + [limit, offset]
+            )
+            return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend():
+    """Return the backend named by settings.SEARCH_BACKEND, or the one for the database vendor"""
+    path = getattr(settings, 'SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    return BACKENDS[connection.vendor]()
+
+
+class SearchResults:
+    """Lazy, sliceable result set so DRF's paginators can page through a search"""
+
+    def __init__(self, backend, tokens, kind=None):
+        self.backend = backend
+        self.tokens = tokens
+        self.kind = kind
+
+    def count(self):
+        if not self.tokens:
+            return 0
+        return self.backend.count(self.tokens, self.kind)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            raise TypeError('SearchResults only supports slicing')
+        if not self.tokens:
+            return []
+        offset = item.start or 0
+        return self.backend.search(self.tokens, self.kind, offset=offset, limit=item.stop - offset)
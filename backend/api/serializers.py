@@ -1,8 +1,13 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import User, StudySession, StudyGroup, SessionRSVP, GroupMembership, Badge
+from .metrics import TimedSerializerMixin
+from .rank_index import rank_index
+from .ranking import DEFAULT_BADGE
+from .schedule import fill_session_times
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for User model"""
     class Meta:
         model = User
@@ -10,7 +15,12 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'level', 'xp', 'created_at']
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+def profile_groups(queryset):
+    """Approved groups with members_count annotated, as listed on a profile"""
+    return queryset.filter(status='approved').with_membership().only('id', 'name')
+
+
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Detailed user profile with badges and groups"""
     badges = serializers.SerializerMethodField()
     groups = serializers.SerializerMethodField()
@@ -20,20 +30,31 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'image', 'level', 'xp', 'is_staff', 'badges', 'groups', 'created_at']
         read_only_fields = ['id', 'level', 'xp', 'is_staff', 'created_at']
     
+    @staticmethod
+    def prefetches():
+        """Badges, and approved groups with members_count, in one query each"""
+        return [
+            'badges',
+            Prefetch('joined_groups', queryset=profile_groups(StudyGroup.objects.all()), to_attr='profile_groups'),
+        ]
+    
     def get_badges(self, obj):
         badges = obj.badges.all()
         return BadgeSerializer(badges, many=True).data
     
     def get_groups(self, obj):
-        memberships = obj.joined_groups.filter(status='approved')
+        groups = getattr(obj, 'profile_groups', None)
+        if groups is None:
+            groups = profile_groups(obj.joined_groups.all())
         return [{
             'id': group.id,
             'name': group.name,
-            'members_count': group.members.count()
-        } for group in memberships]
+            'members_count': group.members_count
+        } for group in groups]
 
 
-class BadgeSerializer(serializers.ModelSerializer):
+
+class BadgeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Badge model"""
     class Meta:
         model = Badge
@@ -41,12 +62,13 @@ class BadgeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'earned_at']
 
 
-class StudyGroupSerializer(serializers.ModelSerializer):
+class StudyGroupSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for StudyGroup with creator and member info"""
     creator_name = serializers.CharField(source='creator.username', read_only=True)
-    members_count = serializers.SerializerMethodField()
+    # Populated by StudyGroup.objects.with_membership().with_member_preview()
+    members_count = serializers.IntegerField(read_only=True)
     member_images = serializers.SerializerMethodField()
-    is_member = serializers.SerializerMethodField()
+    is_member = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = StudyGroup
@@ -54,83 +76,99 @@ class StudyGroupSerializer(serializers.ModelSerializer):
                   'members_count', 'member_images', 'is_member', 'status', 'created_at', 'updated_at']
         read_only_fields = ['id', 'creator', 'status', 'created_at', 'updated_at']
     
-    def get_members_count(self, obj):
-        return obj.members.count()
-    
     def get_member_images(self, obj):
-        members = obj.members.all()[:3]
+        members = [membership.user for membership in obj.member_preview]
         return [member.image if member.image else f"https://api.dicebear.com/7.x/avataaars/svg?seed={member.username}" 
                 for member in members]
-    
-    def get_is_member(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.members.filter(id=request.user.id).exists()
-        return False
 
 
-class StudyGroupCreateSerializer(serializers.ModelSerializer):
+class StudyGroupCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for creating study groups"""
     class Meta:
         model = StudyGroup
         fields = ['name', 'subject', 'description']
 
 
-class StudySessionSerializer(serializers.ModelSerializer):
+class StudySessionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for StudySession with host and attendee info"""
     host_name = serializers.CharField(source='host.username', read_only=True)
     host_image = serializers.SerializerMethodField()
     group_name = serializers.CharField(source='group.name', read_only=True, allow_null=True)
-    attendees_count = serializers.SerializerMethodField()
+    # Populated by StudySession.objects.with_attendance()
+    attendees_count = serializers.IntegerField(read_only=True)
     attendees_list = serializers.SerializerMethodField()
-    is_attending = serializers.SerializerMethodField()
+    is_attending = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = StudySession
-        fields = ['id', 'title', 'course_code', 'description', 'date', 'time', 'location',
+        fields = ['id', 'title', 'course_code', 'description', 'date', 'time', 'starts_at', 'ends_at', 'location',
                   'host', 'host_name', 'host_image', 'group', 'group_name', 
                   'attendees_count', 'attendees_list', 'is_attending', 'created_at', 'updated_at']
         read_only_fields = ['id', 'host', 'created_at', 'updated_at']
     
+    def validate(self, attrs):
+        return fill_session_times(attrs, self.instance)
+    
     def get_host_image(self, obj):
         if obj.host.image:
             return obj.host.image
         return f"https://api.dicebear.com/7.x/avataaars/svg?seed={obj.host.username}"
     
-    def get_attendees_count(self, obj):
-        return obj.attendees.count()
-    
     def get_attendees_list(self, obj):
         attendees = obj.attendees.all()
         return [{
             'name': f"{attendee.first_name} {attendee.last_name}" if attendee.first_name else attendee.username,
             'image': attendee.image if attendee.image else f"https://api.dicebear.com/7.x/avataaars/svg?seed={attendee.username}"
         } for attendee in attendees]
-    
-    def get_is_attending(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.attendees.filter(id=request.user.id).exists()
-        return False
 
 
-class StudySessionCreateSerializer(serializers.ModelSerializer):
+class StudySessionCreateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for creating study sessions"""
     class Meta:
         model = StudySession
-        fields = ['title', 'course_code', 'description', 'date', 'time', 'location', 'group']
+        fields = ['title', 'course_code', 'description', 'date', 'time', 'starts_at', 'ends_at', 'location', 'group']
+    
+    def validate(self, attrs):
+        return fill_session_times(attrs, self.instance)
 
 
-class LeaderboardSerializer(serializers.ModelSerializer):
+class LeaderboardSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for leaderboard rankings"""
     badge = serializers.SerializerMethodField()
+    # XP earned within the requested leaderboard period
+    period_xp = serializers.IntegerField(read_only=True)
+    rank = serializers.IntegerField(read_only=True)
+    # All-time rank as a percentage of all users, from the in-memory rank index
+    percentile = serializers.SerializerMethodField()
     
     class Meta:
         model = User
-        fields = ['id', 'username', 'first_name', 'last_name', 'image', 'xp', 'level', 'badge']
+        fields = [
+            'id', 'username', 'first_name', 'last_name', 'image', 'xp', 'period_xp', 'level', 'badge', 'rank',
+            'percentile',
+        ]
     
     def get_badge(self, obj):
-        latest_badge = obj.badges.first()
-        if latest_badge:
-            return latest_badge.name
-        return 'Rising Star'  # Default badge
+        # latest_badge is annotated by the leaderboard queries (see api.ranking)
+        return obj.latest_badge or DEFAULT_BADGE
+    
+    def get_percentile(self, obj):
+        return rank_index.standing(obj.xp)['percentile']
+
+
+class RecommendedGroupSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Summary of a recommended group"""
+    score = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = StudyGroup
+        fields = ['id', 'name', 'subject', 'description', 'score']
+
+
+class RecommendedSessionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Summary of a recommended session"""
+    score = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = StudySession
+        fields = ['id', 'title', 'course_code', 'date', 'time', 'starts_at', 'location', 'score']
@@ -0,0 +1,124 @@
+"""Signal handlers keeping UserStats, updated_at, the search and rank indexes and cached users and profiles in step with writes"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_profile_version, bump_user_version, bump_version
+from .models import User, SessionRSVP, GroupMembership, StudyGroup, StudySession, Badge
+from .rank_index import user_deleted, user_saved
+from .search import get_search_backend, object_kind
+from .stats import bump_user_stats
+
+
+COLLECTIONS = {StudySession: 'sessions', StudyGroup: 'groups'}
+
+
+def touch(model, *pks):
+    """Stamp updated_at and bump the model's collection so validators reflect attendance/membership changes"""
+    model.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+    bump_version(COLLECTIONS[model])
+
+
+@receiver(post_save, sender=SessionRSVP)
+def rsvp_created(sender, instance, created, **kwargs):
+    if created:
+        bump_user_stats(instance.user_id, sessions_attended=1)
+        touch(StudySession, instance.session_id)
+
+
+@receiver(post_delete, sender=SessionRSVP)
+def rsvp_deleted(sender, instance, **kwargs):
+    # Never recreate the row on delete: the user itself may be mid-cascade
+    bump_user_stats(instance.user_id, create_missing=False, sessions_attended=-1)
+    touch(StudySession, instance.session_id)
+
+
+@receiver(post_save, sender=GroupMembership)
+def membership_created(sender, instance, created, **kwargs):
+    if created:
+        bump_user_stats(instance.user_id, groups_joined=1)
+        touch(StudyGroup, instance.group_id)
+        bump_profile_version(instance.user_id)
+
+
+@receiver(post_delete, sender=GroupMembership)
+def membership_deleted(sender, instance, **kwargs):
+    bump_user_stats(instance.user_id, create_missing=False, groups_joined=-1)
+    touch(StudyGroup, instance.group_id)
+    bump_profile_version(instance.user_id)
+
+
+@receiver(post_save, sender=StudySession)
+def session_created(sender, instance, created, **kwargs):
+    if created:
+        bump_user_stats(instance.host_id, sessions_hosted=1)
+
+
+@receiver(post_delete, sender=StudySession)
+def session_deleted(sender, instance, **kwargs):
+    bump_user_stats(instance.host_id, create_missing=False, sessions_hosted=-1)
+
+
+@receiver(post_save, sender=StudyGroup)
+def group_created(sender, instance, created, **kwargs):
+    if created:
+        bump_user_stats(instance.creator_id, groups_created=1)
+
+
+@receiver(post_delete, sender=StudyGroup)
+def group_deleted(sender, instance, **kwargs):
+    bump_user_stats(instance.creator_id, create_missing=False, groups_created=-1)
+
+
+@receiver(post_save, sender=StudySession)
+@receiver(post_delete, sender=StudySession)
+@receiver(post_save, sender=StudyGroup)
+@receiver(post_delete, sender=StudyGroup)
+def collection_changed(sender, instance, **kwargs):
+    # List ETags are built from the collection versions alone, so admin and shell writes must bump them too
+    bump_version(COLLECTIONS[sender])
+
+
+@receiver(post_save, sender=StudySession)
+@receiver(post_save, sender=StudyGroup)
+def index_for_search(sender, instance, **kwargs):
+    # Also drops groups that are no longer approved from the index
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=StudySession)
+@receiver(post_delete, sender=StudyGroup)
+def remove_from_search(sender, instance, **kwargs):
+    get_search_backend().remove(object_kind(instance), instance.pk)
+
+
+@receiver(post_save, sender=StudyGroup)
+def group_changed(sender, instance, created, **kwargs):
+    # Profiles list their approved groups by name, so approvals and renames reach every member
+    if not created:
+        member_ids = list(GroupMembership.objects.filter(group=instance).values_list('user_id', flat=True))
+        if member_ids:
+            bump_profile_version(*member_ids)
+
+
+@receiver(post_save, sender=Badge)
+@receiver(post_delete, sender=Badge)
+def badge_changed(sender, instance, **kwargs):
+    bump_profile_version(instance.user_id)
+    # Leaderboard rows show each user's latest badge
+    bump_version('leaderboard')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, signal, update_fields=None, **kwargs):
+    # Profile edits, staff changes, password changes and last_login all go through save()
+    bump_user_version(instance.pk)
+    bump_profile_version(instance.pk)
+    # Leaderboard rows show names and XP; a login only stamps last_login
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        bump_version('leaderboard')
+    if signal is post_delete:
+        user_deleted(instance.pk)
+    else:
+        user_saved(instance.pk, instance.xp)
@@ -0,0 +1,78 @@
+"""Maintenance of the denormalized UserStats counters"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .badges import check_badges
+from .models import User, UserStats, SessionRSVP, GroupMembership, StudySession, StudyGroup
+
+STAT_SOURCES = {
+    'sessions_attended': (SessionRSVP, 'user'),
+    'groups_joined': (GroupMembership, 'user'),
+    'sessions_hosted': (StudySession, 'host'),
+    'groups_created': (StudyGroup, 'creator'),
+}
+
+
+def _count_for_user(model, field):
+    rows = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(
+        count=Count('*')
+    ).values('count')
+    return Coalesce(Subquery(rows), 0)
+
+
+def bump_user_stats(user_id, create_missing=True, **deltas):
+    """Apply counter deltas with a single UPDATE, rebuilding the row if it does not exist yet"""
+    changes = {name: F(name) + delta for name, delta in deltas.items()}
+    if not UserStats.objects.filter(pk=user_id).update(updated_at=timezone.now(), **changes) and create_missing:
+        # Counted after the triggering write, so the rebuilt row already includes it
+        rebuild_user_stats([user_id])
+    # Outside a transaction on_commit runs at once, so the counters must already be written
+    check_badges([user_id], [name for name, delta in deltas.items() if delta > 0])
+
+
+def rebuild_user_stats(user_ids=None, batch_size=1000):
+    """Recount UserStats from the source tables, writing only rows that drifted
+
+    Returns the number of rows created or repaired.
+    """
+    users = User.objects.order_by('pk')
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+
+    names = list(STAT_SOURCES)
+    actual = {f'actual_{name}': _count_for_user(*source) for name, source in STAT_SOURCES.items()}
+    stored = {f'stored_{name}': F(f'stats__{name}') for name in names}
+    rows = users.annotate(**actual, **stored).values_list(
+        'pk', *actual, *stored
+    ).iterator(chunk_size=batch_size)
+
+    repaired = 0
+    batch = []
+    for row in rows:
+        pk, counts, current = row[0], row[1:len(names) + 1], row[len(names) + 1:]
+        if counts == current:
+            continue
+        batch.append(UserStats(user_id=pk, **dict(zip(names, counts))))
+        if len(batch) >= batch_size:
+            repaired += _upsert(batch, names)
+            batch = []
+    if batch:
+        repaired += _upsert(batch, names)
+    return repaired
+
+
+def _upsert(batch, names):
+    UserStats.objects.bulk_create(
+        batch, update_conflicts=True, unique_fields=['user'], update_fields=names + ['updated_at']
+    )
+    return len(batch)
+
+
+def get_user_stats(user):
+    """Fetch a user's counters with a primary-key lookup, building them on first use"""
+    stats = UserStats.objects.filter(pk=user.pk).first()
+    if stats is None:
+        rebuild_user_stats([user.pk])
+        stats = UserStats.objects.get(pk=user.pk)
+    return stats
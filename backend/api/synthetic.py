@@ -0,0 +1,252 @@
+"""Deterministic synthetic data for load testing
+
+Rows are produced by generators and written ``batch_size`` at a time inside a
+single transaction, so memory stays flat whatever the scale: only the primary
+keys later tables point at are kept. Every user shares one precomputed
+password hash, and the same scale and seed always produce the same data.
+
+Rows are plain value tuples written as multi-row INSERT ... VALUES statements
+rather than model instances through bulk_create: preparing every value through
+its model field costs several times the INSERT itself at this volume. Like
+bulk_create, each statement carries as many rows as the backend's parameter
+limit allows, so Postgres takes a batch per round trip where executemany
+would send a row per round trip. Field defaults and timestamps are prepared
+once per table, and primary keys are assigned up front so later tables can
+point at rows without reading them back.
+"""
+import random
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import (
+    User, StudyGroup, StudySession, GroupMembership, SessionRSVP, Badge, XPEvent, XPRollup, UserStats, Recommendation
+)
+from .search import get_search_backend
+from .utils import bucket_start, calculate_level, XP_REWARDS
+
+PASSWORD = 'password123'
+BATCH_SIZE = 5000
+
+# Rows per user, roughly the shape of the demo data
+GROUPS_PER_USER = 0.1
+SESSIONS_PER_USER = 0.5
+MEMBERSHIPS_PER_USER = 2
+RSVPS_PER_USER = 5
+BADGE_SHARE = 0.2
+ACTIVE_SHARE = 0.3  # users with an XP award in the last 30 days
+
+COURSES = ['22CS3AEFWD', '23MA3BSSDM', '23CS3PCOOJ', '23CS3PCDST', '23CS6PCMAL']
+TOPICS = ['algorithms', 'calculus', 'databases', 'networks', 'statistics', 'compilers', 'graphs', 'probability']
+LOCATIONS = ['Library', 'Reference Section, 2nd Floor PJA Block', 'Lab 3', 'Online']
+BADGES = [
+    ('Rising Star', 'Zap', 'text-purple-500', 'bg-purple-500/20'),
+    ('Team Player', 'Users', 'text-green-500', 'bg-green-500/20'),
+    ('Study Buddy', 'BookOpen', 'text-cyan-500', 'bg-cyan-500/20'),
+    ('Weekend Warrior', 'Target', 'text-red-500', 'bg-red-500/20'),
+]
+
+
+class TableWriter:
+    """Chunked multi-row INSERTs into one model's table
+
+    Each row supplies ``fields`` in order, already in database form (ids,
+    strings, adapt_datetime() results). Every other column gets ``constants``
+    or the field default, prepared once; auto_now/auto_now_add columns get now.
+    """
+
+    def __init__(self, model, fields, now, batch_size=BATCH_SIZE, **constants):
+        self.model = model
+        self.batch_size = batch_size
+        self.count = 0
+        quote = connection.ops.quote_name
+        extra = []
+        for field in model._meta.concrete_fields:
+            # Auto-increment keys not supplied per row are left to the database
+            if field.name in fields or field.db_returning:
+                continue
+            if field.name in constants:
+                value = constants[field.name]
+            elif getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                value = now
+            else:
+                value = field.get_default()
+            extra.append((field.column, field.get_db_prep_save(value, connection)))
+        columns = [model._meta.get_field(name).column for name in fields] + [column for column, _ in extra]
+        self.constants = tuple(value for _, value in extra)
+        self.sql = (
+            f'INSERT INTO {quote(model._meta.db_table)} ({", ".join(quote(column) for column in columns)}) VALUES '
+        )
+        self.placeholder = f'({", ".join(["%s"] * len(columns))})'
+        # Rows per statement within the backend's query parameter limit, as bulk_create batches
+        self.rows_per_statement = max(1, min(batch_size, connection.ops.bulk_batch_size(columns, [None] * batch_size)))
+
+    def next_pk(self):
+        return (self.model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def write(self, rows):
+        """Insert an iterable of tuples; returns the number of rows written"""
+        rows = iter(rows)
+        written = 0
+        with connection.cursor() as cursor:
+            while True:
+                batch = list(islice(rows, self.rows_per_statement))
+                if not batch:
+                    break
+                sql = self.sql + ', '.join([self.placeholder] * len(batch))
+                cursor.execute(sql, [value for row in batch for value in row + self.constants])
+                written += len(batch)
+        self.count += written
+        return written
+
+
+def adapt_datetime(value):
+    return connection.ops.adapt_datetimefield_value(value)
+
+
+def reset_sequences(*model_classes):
+    """Move auto-increment sequences past explicitly inserted primary keys (nothing to do on SQLite)"""
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), model_classes):
+            cursor.execute(sql)
+
+
+def clear():
+    """Delete all users and API data with one statement per table
+
+    Plain DELETEs skip the per-row delete signals, which would otherwise load
+    every row to update counters and caches that are going away anyway.
+    """
+    model_classes = (
+        Recommendation, Badge, SessionRSVP, GroupMembership, XPRollup, XPEvent, UserStats, StudySession, StudyGroup,
+        LogEntry, User.groups.through, User.user_permissions.through, User,
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in model_classes:
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+        get_search_backend().clear()
+    # Cached responses and users all describe rows that no longer exist
+    cache.clear()
+
+
+def generate(users, seed=0, batch_size=BATCH_SIZE, log=None):
+    """Insert ``users`` users plus groups, sessions, memberships, RSVPs, badges and XP in proportion
+
+    Returns a dict of table name to rows created. Rows are written without
+    signals, so rebuild the search index afterwards (the seed command does);
+    XP rollups are written alongside their events.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    log = log or (lambda message: None)
+
+    def writer(model, fields, **constants):
+        return TableWriter(model, fields, now, batch_size, **constants)
+
+    user_writer = writer(User, ('id', 'username', 'email', 'last_name', 'xp', 'level'),
+                         password=make_password(PASSWORD), first_name='User', date_joined=now)
+    group_writer = writer(StudyGroup, ('id', 'name', 'subject', 'description', 'creator', 'status'))
+    session_writer = writer(StudySession, (
+        'id', 'title', 'course_code', 'description', 'location', 'date', 'time', 'starts_at', 'ends_at',
+        'host', 'group',
+    ))
+    membership_writer = writer(GroupMembership, ('user', 'group'))
+    rsvp_writer = writer(SessionRSVP, ('user', 'session'))
+    badge_writer = writer(Badge, ('user', 'name', 'icon', 'color', 'bg_color'))
+    event_writer = writer(XPEvent, ('user', 'amount', 'reason', 'created_at'))
+    rollup_writer = writer(XPRollup, ('user', 'period', 'bucket_start', 'xp'))
+
+    with transaction.atomic():
+        first_user = user_writer.next_pk()
+        user_ids = range(first_user, first_user + users)
+
+        def user_rows():
+            for user_id in user_ids:
+                idx = user_id - first_user
+                xp = rng.randint(0, 5000)
+                yield user_id, f'user{idx}', f'user{idx}@example.com', str(idx), xp, calculate_level(xp)
+
+        user_writer.write(user_rows())
+        log(f'Created {user_writer.count} users')
+
+        first_group = group_writer.next_pk()
+        group_ids = range(first_group, first_group + max(1, int(users * GROUPS_PER_USER)))
+        approved = []
+
+        def group_rows():
+            for group_id in group_ids:
+                status = rng.choices(['approved', 'pending', 'rejected'], weights=[80, 15, 5])[0]
+                if status == 'approved':
+                    approved.append(group_id)
+                yield (
+                    group_id, f'{rng.choice(TOPICS).title()} circle {group_id - first_group}', rng.choice(COURSES),
+                    f'Weekly {rng.choice(TOPICS)} practice', rng.choice(user_ids), status,
+                )
+
+        group_writer.write(group_rows())
+        log(f'Created {group_writer.count} groups')
+
+        first_session = session_writer.next_pk()
+        session_ids = range(first_session, first_session + max(1, int(users * SESSIONS_PER_USER)))
+
+        def session_rows():
+            for session_id in session_ids:
+                starts_at = now + timedelta(hours=rng.randint(-24 * 30, 24 * 30))
+                ends_at = starts_at + timedelta(hours=2)
+                yield (
+                    session_id, f'{rng.choice(TOPICS).title()} review {session_id - first_session}', rng.choice(COURSES),
+                    f'Going through {rng.choice(TOPICS)} problems', rng.choice(LOCATIONS),
+                    starts_at.strftime('%B %d'), f"{starts_at.strftime('%I:%M %p')} - {ends_at.strftime('%I:%M %p')}",
+                    adapt_datetime(starts_at), adapt_datetime(ends_at), rng.choice(user_ids),
+                    rng.choice(approved) if approved and rng.random() < 0.5 else None,
+                )
+
+        session_writer.write(session_rows())
+        log(f'Created {session_writer.count} sessions')
+
+        membership_writer.write(
+            (user_id, group_id)
+            for user_id in user_ids
+            for group_id in rng.sample(approved, min(MEMBERSHIPS_PER_USER, len(approved)))
+        )
+        log(f'Created {membership_writer.count} memberships')
+        rsvp_writer.write(
+            (user_id, session_id)
+            for user_id in user_ids
+            for session_id in rng.sample(session_ids, min(RSVPS_PER_USER, len(session_ids)))
+        )
+        log(f'Created {rsvp_writer.count} RSVPs')
+
+        badge_writer.write(
+            (user_id, *rng.choice(BADGES)) for user_id in user_ids if rng.random() < BADGE_SHARE
+        )
+
+        # One recent award for a share of users, with the rollups award_xp would have kept
+        rewards = sorted(XP_REWARDS.items())
+        awards = []
+        for user_id in user_ids:
+            if rng.random() < ACTIVE_SHARE:
+                reason, amount = rng.choice(rewards)
+                awards.append((user_id, amount, reason, now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))))
+        event_writer.write((user_id, amount, reason, adapt_datetime(at)) for user_id, amount, reason, at in awards)
+        rollup_writer.write(
+            (user_id, period, connection.ops.adapt_datefield_value(bucket_start(period, timezone.localdate(at))), amount)
+            for user_id, amount, _, at in awards
+            for period, _ in XPRollup.PERIOD_CHOICES
+        )
+        log(f'Created {badge_writer.count} badges and {event_writer.count} XP events')
+
+        reset_sequences(User, StudyGroup, StudySession)
+
+    writers = (
+        user_writer, group_writer, session_writer, membership_writer, rsvp_writer, badge_writer,
+        event_writer, rollup_writer,
+    )
+    return {writer.model._meta.db_table: writer.count for writer in writers}
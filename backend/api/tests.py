@@ -1,3 +1,1475 @@
-from django.test import TestCase
+import asyncio
+from datetime import date, datetime, timedelta
+from io import StringIO
+from tempfile import TemporaryDirectory
+from threading import Barrier, Thread
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .cache import response_cache_stats
+from .idempotency import IN_PROGRESS, idempotency_cache_key
+from .metrics import registry
+from .rank_index import RankIndex, rank_index
+from .models import (
+    User, StudySession, StudyGroup, SessionRSVP, GroupMembership, Badge, Recommendation, UserStats, XPEvent,
+    XPRollup,
+)
+from .schedule import parse_session_times
+from .utils import award_xp, award_xp_bulk, bucket_start, calculate_level
+from .views import insert_missing
+
+
+class StudySphereTestCase(APITestCase):
+    """Start every test with an empty response cache and a rank index of the empty database"""
+
+    def setUp(self):
+        cache.clear()
+        rank_index.reconcile()
+
+
+class StudySessionQueryCountTests(StudySphereTestCase):
+    """Session endpoints must cost a fixed number of queries regardless of row count"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='viewer', password='password123')
+        self.group = StudyGroup.objects.create(
+            name='Group', subject='CS101', description='Group', creator=self.user, status='approved'
+        )
+
+    def create_sessions(self, count):
+        for idx in range(count):
+            host = User.objects.create_user(username=f'host{StudySession.objects.count()}')
+            session = StudySession.objects.create(
+                title=f'Session {idx}', course_code='CS101', description='Session',
+                date='October 22', time='8:00 AM - 10:00 AM', location='Lab',
+                host=host, group=self.group,
+            )
+            SessionRSVP.objects.create(user=host, session=session)
+            SessionRSVP.objects.create(user=self.user, session=session)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_list_query_count_is_constant(self):
+        self.client.force_authenticate(self.user)
+        self.create_sessions(1)
+        small, _ = self.count_queries('/api/sessions/')
+        self.create_sessions(10)
+        large, response = self.count_queries('/api/sessions/')
+        self.assertEqual(small, large)
+        # ETag validators, COUNT for pagination, the annotated page and the attendees prefetch
+        self.assertEqual(large, 4)
+        self.assertEqual(response.data['results'][0]['attendees_count'], 2)
+        self.assertTrue(response.data['results'][0]['is_attending'])
+
+    def test_anonymous_list_is_not_attending(self):
+        self.create_sessions(3)
+        queries, response = self.count_queries('/api/sessions/')
+        self.assertEqual(queries, 4)
+        self.assertFalse(any(row['is_attending'] for row in response.data['results']))
+
+    def test_detail_query_count(self):
+        self.client.force_authenticate(self.user)
+        self.create_sessions(2)
+        session = StudySession.objects.first()
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/sessions/{session.id}/')
+        self.assertEqual(response.data['attendees_count'], 2)
+        self.assertTrue(response.data['is_attending'])
+
+    def test_group_sessions_query_count_is_constant(self):
+        self.client.force_authenticate(self.user)
+        self.create_sessions(1)
+        small, _ = self.count_queries(f'/api/groups/{self.group.id}/sessions/')
+        self.create_sessions(10)
+        large, response = self.count_queries(f'/api/groups/{self.group.id}/sessions/')
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data), 11)
+
+    def test_dashboard_query_count_is_constant(self):
+        self.client.force_authenticate(self.user)
+        GroupMembership.objects.create(user=self.user, group=self.group)
+        self.create_sessions(1)
+        small, _ = self.count_queries('/api/dashboard/')
+        self.create_sessions(5)
+        large, response = self.count_queries('/api/dashboard/')
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data['upcoming_sessions']), 3)
+        self.assertTrue(all(row['is_attending'] for row in response.data['upcoming_sessions']))
+
+
+class StudyGroupQueryCountTests(StudySphereTestCase):
+    """Group endpoints must cost a fixed number of queries regardless of group count or size"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='viewer', password='password123')
+
+    def create_groups(self, count, size):
+        for idx in range(count):
+            creator = User.objects.create_user(username=f'creator{StudyGroup.objects.count()}')
+            group = StudyGroup.objects.create(
+                name=f'Group {idx}', subject='CS101', description='Group', creator=creator, status='approved'
+            )
+            GroupMembership.objects.create(user=creator, group=group)
+            for member_idx in range(size - 1):
+                member = User.objects.create_user(username=f'member{group.id}-{member_idx}')
+                GroupMembership.objects.create(user=member, group=group)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_list_query_count_is_constant(self):
+        self.client.force_authenticate(self.user)
+        self.create_groups(1, 2)
+        small, _ = self.count_queries('/api/groups/')
+        self.create_groups(5, 6)
+        large, response = self.count_queries('/api/groups/')
+        self.assertEqual(small, large)
+        # ETag validators, COUNT for pagination, the annotated page and the member preview prefetch
+        self.assertEqual(large, 4)
+        newest = response.data['results'][0]
+        self.assertEqual(newest['members_count'], 6)
+        self.assertEqual(len(newest['member_images']), 3)
+        self.assertFalse(newest['is_member'])
+
+    def test_is_member_annotation(self):
+        self.create_groups(1, 1)
+        group = StudyGroup.objects.get()
+        GroupMembership.objects.create(user=self.user, group=group)
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/groups/{group.id}/')
+        self.assertTrue(response.data['is_member'])
+        self.assertEqual(response.data['members_count'], 2)
+
+    def test_member_preview_is_earliest_members(self):
+        self.create_groups(1, 5)
+        group = StudyGroup.objects.get()
+        response = self.client.get(f'/api/groups/{group.id}/')
+        expected = [
+            f"https://api.dicebear.com/7.x/avataaars/svg?seed={membership.user.username}"
+            for membership in GroupMembership.objects.filter(group=group).order_by('joined_at', 'id')[:3]
+        ]
+        self.assertEqual(response.data['member_images'], expected)
+
+
+class LeaderboardPeriodTests(StudySphereTestCase):
+    """Leaderboard periods are ranked from the XP rollups"""
+
+    def setUp(self):
+        super().setUp()
+        self.veteran = User.objects.create_user(username='veteran', xp=5000)
+        self.newcomer = User.objects.create_user(username='newcomer')
+        # XP earned last week only counts towards the all-time board
+        last_week = timezone.now() - timedelta(days=8)
+        XPEvent.objects.create(user=self.veteran, amount=5000, reason='seed', created_at=last_week)
+        call_command('rebuild_xp_rollups', stdout=StringIO())
+
+    def test_award_xp_writes_ledger_and_rollups(self):
+        award_xp(self.newcomer, 30, 'create_group')
+        award_xp(self.newcomer, 10, 'rsvp_session')
+        self.assertEqual(XPEvent.objects.filter(user=self.newcomer).count(), 2)
+        today = timezone.localdate()
+        for period in ['day', 'week', 'month']:
+            rollup = XPRollup.objects.get(user=self.newcomer, period=period, bucket_start=bucket_start(period, today))
+            self.assertEqual(rollup.xp, 40)
+
+    def test_week_board_only_counts_this_week(self):
+        award_xp(self.newcomer, 25, 'join_group')
+        response = self.client.get('/api/leaderboard/?period=week')
+        self.assertEqual([row['username'] for row in response.data], ['newcomer'])
+        self.assertEqual(response.data[0]['period_xp'], 25)
+        self.assertEqual(response.data[0]['rank'], 1)
+
+    def test_all_time_board_uses_total_xp(self):
+        award_xp(self.newcomer, 25, 'join_group')
+        response = self.client.get('/api/leaderboard/?period=all')
+        self.assertEqual([row['username'] for row in response.data], ['veteran', 'newcomer'])
+
+    def test_rebuild_matches_incremental_rollups(self):
+        award_xp(self.newcomer, 25, 'join_group')
+        award_xp(self.veteran, 50, 'create_session')
+        incremental = set(XPRollup.objects.values_list('user_id', 'period', 'bucket_start', 'xp'))
+        # Batches smaller than the result exercise the streamed inserts
+        call_command('rebuild_xp_rollups', batch_size=1, stdout=StringIO())
+        rebuilt = set(XPRollup.objects.values_list('user_id', 'period', 'bucket_start', 'xp'))
+        self.assertEqual(incremental, rebuilt)
+
+
+class LeaderboardRankTests(StudySphereTestCase):
+    """Leaderboard ranks and badges come from the ranking queries, ties sharing a rank"""
+
+    XP = [90, 80, 80, 70, 60, 60, 60, 50, 40, 30, 20, 20, 10, 0]
+
+    def setUp(self):
+        super().setUp()
+        self.users = [User.objects.create_user(username=f'player{idx}', xp=xp) for idx, xp in enumerate(self.XP)]
+
+    def expected_ranks(self):
+        """Standard competition ranking computed in Python"""
+        return {user.username: 1 + sum(other > user.xp for other in self.XP) for user in self.users}
+
+    def test_top_ten_ranks_and_badges_in_fixed_queries(self):
+        for user in self.users:
+            Badge.objects.create(user=user, name='Team Player', icon='Users', color='c', bg_color='b')
+            Badge.objects.create(user=user, name='Study Buddy', icon='BookOpen', color='c', bg_color='b')
+        self.client.force_authenticate(self.users[0])
+        # The ETag validators and one ranked query with the latest badge inlined
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/leaderboard/?period=all')
+        expected = self.expected_ranks()
+        self.assertEqual([row['rank'] for row in response.data], [expected[row['username']] for row in response.data])
+        self.assertEqual([row['rank'] for row in response.data], [1, 2, 2, 4, 5, 5, 5, 8, 9, 10])
+        self.assertEqual({row['badge'] for row in response.data}, {'Study Buddy'})
+
+    def test_around_me_matches_global_ranking(self):
+        expected = self.expected_ranks()
+        ordered = sorted(self.users, key=lambda user: (-user.xp, user.id))
+        for position, user in enumerate(ordered):
+            self.client.force_authenticate(user)
+            response = self.client.get('/api/leaderboard/?period=all&around=me&size=2')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['rank'], expected[user.username])
+            neighbours = ordered[max(0, position - 2):position + 3]
+            self.assertEqual([row['username'] for row in response.data['results']], [u.username for u in neighbours])
+            self.assertEqual([row['rank'] for row in response.data['results']], [expected[u.username] for u in neighbours])
+
+    def test_around_me_on_period_board(self):
+        award_xp(self.users[5], 25, 'join_group')
+        award_xp(self.users[3], 10, 'rsvp_session')
+        award_xp(self.users[8], 25, 'join_group')
+        self.client.force_authenticate(self.users[3])
+        response = self.client.get('/api/leaderboard/?period=week&around=me')
+        self.assertEqual(response.data['rank'], 3)
+        self.assertEqual([row['rank'] for row in response.data['results']], [1, 1, 3])
+        self.assertEqual(response.data['results'][2]['period_xp'], 10)
+
+        self.client.force_authenticate(self.users[0])
+        response = self.client.get('/api/leaderboard/?period=week&around=me')
+        self.assertEqual(response.data, {'rank': None, 'results': []})
+
+    def test_around_me_validation(self):
+        self.assertEqual(self.client.get('/api/leaderboard/?around=me').status_code, 401)
+        self.client.force_authenticate(self.users[0])
+        self.assertEqual(self.client.get('/api/leaderboard/?around=me&size=0').status_code, 400)
+        self.assertEqual(self.client.get('/api/leaderboard/?around=me&size=26').status_code, 400)
+
+    def test_all_time_board_uses_xp_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan text is SQLite specific')
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/leaderboard/?period=all')
+        ranked = next(query['sql'] for query in ctx.captured_queries if 'RANK()' in query['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {ranked}')
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('user_xp_idx', plan)
+
+
+class RankIndexTests(StudySphereTestCase):
+    """The in-memory rank index answers rank and percentile without queries and follows committed XP"""
+
+    def setUp(self):
+        super().setUp()
+        self.users = [
+            User.objects.create_user(username=f'ranked{idx}', xp=xp) for idx, xp in enumerate((400, 300, 300, 200, 100))
+        ]
+        rank_index.reconcile()
+
+    def test_standing_with_ties(self):
+        with self.assertNumQueries(0):
+            standings = [rank_index.standing(xp) for xp in (500, 400, 300, 250, 200, 0)]
+        self.assertEqual([standing['rank'] for standing in standings], [1, 1, 2, 4, 4, 6])
+        self.assertEqual([standing['percentile'] for standing in standings], [20.0, 20.0, 40.0, 80.0, 80.0, 100.0])
+
+    def test_committed_changes_apply_incrementally(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            award_xp(self.users[4], 250, 'create_session')
+            newcomer = User.objects.create_user(username='newcomer', xp=1000)
+            self.users[0].delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(rank_index.standing(350)['rank'], 2)
+            self.assertEqual(rank_index.standing(newcomer.xp), {'rank': 1, 'percentile': 20.0})
+
+    def test_rolled_back_award_is_ignored(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            award_xp(self.users[4], 1000, 'create_session')
+        self.assertTrue(callbacks)
+        self.assertEqual(rank_index.standing(1100)['rank'], 1)
+        self.assertEqual(rank_index.standing(100)['rank'], 5)
+
+    def test_reconcile_repairs_drift(self):
+        # Writes that bypass award_xp and the signals, like another process's
+        User.objects.filter(pk__in=[self.users[3].pk, self.users[4].pk]).update(xp=500)
+        self.assertEqual(rank_index.standing(500)['rank'], 1)
+        self.assertEqual(rank_index.reconcile(), 2)
+        self.assertEqual(rank_index.standing(400)['rank'], 3)
+
+    def test_changes_during_reload_are_replayed(self):
+        class SlowIndex(RankIndex):
+            during_load = None
+
+            def load(self):
+                loaded = super().load()
+                if self.during_load:
+                    self.during_load()
+                return loaded
+
+        index = SlowIndex()
+        index.reconcile()
+        newcomer = User.objects.create_user(username='newcomer')
+
+        def commit_during_load():
+            # Commits that land after the users table was read
+            index.add([self.users[4].pk], 1000)
+            index.set(newcomer.pk, 50)
+
+        index.during_load = commit_during_load
+        # Both changes reached the live arrays too, so nothing drifted
+        self.assertEqual(index.reconcile(), 0)
+        self.assertEqual(index.standing(1100), {'rank': 1, 'percentile': 16.7})
+        self.assertEqual(index.standing(50)['rank'], 6)
+
+    def test_leaderboard_percentiles(self):
+        response = self.client.get('/api/leaderboard/?period=all')
+        self.assertEqual([row['percentile'] for row in response.data], [20.0, 40.0, 40.0, 80.0, 100.0])
+
+
+class RankIndexRefreshTests(TransactionTestCase):
+    """A stale index keeps answering while a background thread reloads it"""
+
+    @override_settings(RANK_INDEX_RECONCILE_INTERVAL=0)
+    def test_reloads_in_background_after_interval(self):
+        users = [User.objects.create_user(username=f'ranked{xp}', xp=xp) for xp in (300, 100)]
+        index = RankIndex()
+        index.reconcile()
+        User.objects.filter(pk=users[1].pk).update(xp=500)
+        # Hold the reload back: the lookup must not wait for it
+        with index.reconcile_lock:
+            self.assertEqual(index.standing(400)['rank'], 1)
+        index.refresh_thread.join()
+        self.assertEqual(index.standing(400)['rank'], 2)
+        index.refresh_thread.join()
+
+
+class AwardXPTests(StudySphereTestCase):
+    """XP and level are updated in the database without a full-row save"""
+
+    def test_level_curve_matches_python(self):
+        users = [User.objects.create_user(username=f'user{xp}') for xp in range(0, 6000, 250)]
+        for user, xp in zip(users, range(0, 6000, 250)):
+            award_xp_bulk([user.id], xp)
+        for user, xp in zip(users, range(0, 6000, 250)):
+            user.refresh_from_db()
+            self.assertEqual(user.level, calculate_level(xp))
+
+    def test_award_xp_does_not_rewrite_other_columns(self):
+        user = User.objects.create_user(username='student')
+        with CaptureQueriesContext(connection) as ctx:
+            award_xp(user, 500, 'create_session')
+        user_updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "users"')]
+        self.assertEqual(len(user_updates), 1)
+        self.assertNotIn('"password"', user_updates[0])
+        self.assertEqual((user.xp, user.level), (500, 2))
+
+    def test_bulk_award_is_one_update(self):
+        users = [User.objects.create_user(username=f'user{idx}') for idx in range(5)]
+        with self.assertNumQueries(6):
+            # users UPDATE, ledger INSERT, rollup INSERT and rollup UPDATE inside a savepoint
+            award_xp_bulk([user.id for user in users], 25, 'join_group')
+        self.assertEqual(set(User.objects.values_list('xp', flat=True)), {25})
+        self.assertEqual(XPEvent.objects.count(), 5)
+        self.assertEqual(set(XPRollup.objects.values_list('xp', flat=True)), {25})
+
+
+class ConcurrentAwardXPTests(TransactionTestCase):
+    """Parallel awards against stale user instances must all be counted"""
+
+    def setUp(self):
+        super().setUp()
+        self.database = None
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Threads writing to SQLite's shared in-memory test database fail with "table is
+            # locked" instead of waiting, so this test alone runs on a migrated file database
+            directory = TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            self.database = {**connection.settings_dict, 'NAME': f'{directory.name}/concurrency.sqlite3'}
+            in_memory = connections['default']
+            self.addCleanup(connections.__setitem__, 'default', in_memory)
+            self.addCleanup(connections.close_all)
+            self.use_database()
+            call_command('migrate', verbosity=0)
+
+    def use_database(self):
+        """Point the calling thread's default connection at this test's database"""
+        if self.database is not None:
+            connections['default'] = connections['default'].__class__(self.database, 'default')
+
+    def test_parallel_awards_are_not_lost(self):
+        user = User.objects.create_user(username='student')
+        workers = 8
+        # Every worker holds its own stale copy, as concurrent requests would
+        copies = [User.objects.get(pk=user.pk) for _ in range(workers)]
+        barrier = Barrier(workers)
+        errors = []
+
+        def award(copy):
+            self.use_database()
+            try:
+                barrier.wait()
+                award_xp(copy, 10, 'rsvp_session')
+            except Exception as exc:  # pragma: no cover - surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [Thread(target=award, args=(copy,)) for copy in copies]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        user.refresh_from_db()
+        self.assertEqual(user.xp, workers * 10)
+        self.assertEqual(XPEvent.objects.filter(user=user).count(), workers)
+        self.assertEqual(XPRollup.objects.get(user=user, period='week').xp, workers * 10)
+
+
+class SessionScheduleTests(StudySphereTestCase):
+    """starts_at/ends_at are parsed from the date/time strings and range-filterable"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='host')
+
+    def create_session(self, title, starts_at):
+        return StudySession.objects.create(
+            title=title, course_code='CS101', description='Session', date='', time='',
+            location='Lab', host=self.user, starts_at=starts_at,
+        )
+
+    def test_parse_session_times(self):
+        reference = date(2025, 11, 22)
+        starts_at, ends_at = parse_session_times('Wednesday, October 22nd', '8:00 AM - 10:00 AM', reference)
+        self.assertEqual((starts_at.date(), starts_at.hour, ends_at.hour), (date(2025, 10, 22), 8, 10))
+        starts_at, ends_at = parse_session_times('January 3', '11 PM to 1 AM', reference)
+        self.assertEqual(starts_at.date(), date(2026, 1, 3))
+        self.assertEqual(ends_at - starts_at, timedelta(hours=2))
+        starts_at, ends_at = parse_session_times('2026-10-22', '14:30', reference)
+        self.assertEqual((starts_at.hour, starts_at.minute, ends_at), (14, 30, None))
+        self.assertEqual(parse_session_times('someday', 'soon', reference), (None, None))
+
+    def test_create_derives_starts_at(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/api/sessions/', {
+            'title': 'Revision', 'course_code': 'CS101', 'description': 'Revision',
+            'date': '2026-10-22', 'time': '14:30', 'location': 'Lab',
+        })
+        self.assertEqual(response.status_code, 201)
+        session = StudySession.objects.get()
+        self.assertEqual(session.starts_at, timezone.make_aware(datetime(2026, 10, 22, 14, 30)))
+
+    def test_range_filter(self):
+        base = timezone.make_aware(datetime(2026, 3, 2, 9, 0))
+        for offset in range(10):
+            self.create_session(f'Day {offset}', base + timedelta(days=offset))
+        response = self.client.get('/api/sessions/?from=2026-03-04&to=2026-03-07')
+        self.assertEqual([row['title'] for row in response.data['results']], ['Day 2', 'Day 3', 'Day 4'])
+        response = self.client.get('/api/sessions/?from=not-a-date')
+        self.assertEqual(response.status_code, 400)
+
+    def test_backfill_command(self):
+        session = StudySession.objects.create(
+            title='Legacy', course_code='CS101', description='Session', date='October 23',
+            time='1:00 PM - 2:00 PM', location='Lab', host=self.user,
+        )
+        call_command('backfill_session_times', stdout=StringIO())
+        session.refresh_from_db()
+        self.assertEqual((session.starts_at.month, session.starts_at.day, session.starts_at.hour), (10, 23, 13))
+        self.assertEqual(session.ends_at - session.starts_at, timedelta(hours=1))
+
+    def test_backfill_invalidates_cached_ranges(self):
+        session = self.create_session('Legacy', timezone.make_aware(datetime(2026, 3, 2, 9, 0)))
+        StudySession.objects.filter(pk=session.pk).update(date='2026-03-04', time='9:00 AM - 10:00 AM')
+        url = '/api/sessions/?from=2026-03-04&to=2026-03-05'
+        self.assertEqual(self.client.get(url).data['count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('backfill_session_times', all=True, stdout=StringIO())
+        self.assertEqual(self.client.get(url).json()['count'], 1)
+
+    def test_dashboard_upcoming_is_soonest_first(self):
+        now = timezone.now()
+        past = self.create_session('Past', now - timedelta(days=1))
+        later = self.create_session('Later', now + timedelta(days=5))
+        sooner = self.create_session('Sooner', now + timedelta(days=1))
+        for session in (past, later, sooner):
+            SessionRSVP.objects.create(user=self.user, session=session)
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual([row['title'] for row in response.data['upcoming_sessions']], ['Sooner', 'Later'])
+
+
+class KeysetPaginationTests(StudySphereTestCase):
+    """?pagination=cursor seeks on (created_at, id) without COUNT or OFFSET"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='host')
+        StudySession.objects.bulk_create([
+            StudySession(
+                title=f'Session {idx}', course_code='CS101', description='Session',
+                date='', time='', location='Lab', host=self.user,
+            )
+            for idx in range(120)
+        ])
+        # Force ties on created_at so the id tiebreaker is exercised
+        StudySession.objects.filter(id__lte=60).update(created_at=timezone.now() - timedelta(days=1))
+
+    def walk(self, url):
+        pages = []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append((response.data, ctx.captured_queries))
+            url = response.data['next']
+        return pages
+
+    def test_walk_returns_every_row_once_in_order(self):
+        pages = self.walk('/api/sessions/?pagination=cursor')
+        ids = [row['id'] for data, _ in pages for row in data['results']]
+        expected = list(StudySession.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(pages), 3)
+
+    def test_deep_pages_cost_the_same_and_skip_count(self):
+        pages = self.walk('/api/sessions/?pagination=cursor')
+        # ETag validators, the page itself and the attendees prefetch; no pagination COUNT
+        self.assertEqual({len(queries) for _, queries in pages}, {3})
+        for _, queries in pages:
+            self.assertFalse(any('OFFSET' in q['sql'] for q in queries))
+
+    def test_previous_link_returns_prior_page(self):
+        pages = self.walk('/api/sessions/?pagination=cursor')
+        second = pages[1][0]
+        response = self.client.get(second['previous'])
+        self.assertEqual(response.data['results'], pages[0][0]['results'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/sessions/?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+    def test_groups_support_cursor_mode(self):
+        for idx in range(3):
+            StudyGroup.objects.create(
+                name=f'Group {idx}', subject='CS101', description='Group', creator=self.user, status='approved'
+            )
+        StudyGroup.objects.create(name='Pending', subject='CS101', description='Group', creator=self.user)
+        response = self.client.get('/api/groups/?pagination=cursor')
+        self.assertEqual([row['name'] for row in response.data['results']], ['Group 2', 'Group 1', 'Group 0'])
+        self.assertIsNone(response.data['next'])
+
+
+class UserStatsTests(StudySphereTestCase):
+    """Dashboard counters are maintained incrementally and can be reconciled"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='student')
+        self.other = User.objects.create_user(username='other')
+        self.group = StudyGroup.objects.create(
+            name='Group', subject='CS101', description='Group', creator=self.other, status='approved'
+        )
+        self.session = StudySession.objects.create(
+            title='Session', course_code='CS101', description='Session', date='', time='',
+            location='Lab', host=self.other,
+        )
+
+    def stats(self):
+        self.client.force_authenticate(self.user)
+        return self.client.get('/api/dashboard/').data['stats']
+
+    def test_counters_follow_rsvp_and_membership_changes(self):
+        self.client.force_authenticate(self.user)
+        self.client.post(f'/api/sessions/{self.session.id}/rsvp/')
+        self.client.post(f'/api/groups/{self.group.id}/join/')
+        self.client.post('/api/sessions/', {
+            'title': 'Mine', 'course_code': 'CS101', 'description': 'Mine',
+            'date': 'October 22', 'time': '8:00 AM', 'location': 'Lab',
+        })
+        stats = self.stats()
+        self.assertEqual(
+            (stats['sessions_attended'], stats['groups_joined'], stats['sessions_hosted']), (1, 1, 1)
+        )
+
+        self.client.delete(f'/api/sessions/{self.session.id}/cancel_rsvp/')
+        self.client.delete(f'/api/groups/{self.group.id}/leave/')
+        StudySession.objects.get(title='Mine').delete()
+        stats = self.stats()
+        self.assertEqual(
+            (stats['sessions_attended'], stats['groups_joined'], stats['sessions_hosted']), (0, 0, 0)
+        )
+
+    def test_dashboard_stats_are_one_lookup(self):
+        SessionRSVP.objects.create(user=self.user, session=self.session)
+        self.client.force_authenticate(self.user)
+        self.client.get('/api/dashboard/')
+        # Upcoming sessions, their attendees prefetch and the stats primary-key lookup
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.data['stats']['sessions_attended'], 1)
+
+    def test_reconcile_repairs_drift(self):
+        SessionRSVP.objects.create(user=self.user, session=self.session)
+        GroupMembership.objects.create(user=self.user, group=self.group)
+        UserStats.objects.filter(pk=self.user.pk).update(sessions_attended=42, groups_joined=0)
+        out = StringIO()
+        call_command('reconcile_user_stats', stdout=out)
+        self.assertIn('1 rows repaired', out.getvalue())
+        stats = UserStats.objects.get(pk=self.user.pk)
+        self.assertEqual((stats.sessions_attended, stats.groups_joined), (1, 1))
+
+    def test_deleting_user_cascades_cleanly(self):
+        SessionRSVP.objects.create(user=self.user, session=self.session)
+        self.other.delete()
+        self.assertEqual(UserStats.objects.get(pk=self.user.pk).sessions_attended, 0)
+
+
+class BadgeRuleTests(StudySphereTestCase):
+    """Badge rules are checked for the users an event touched, once it commits"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='student')
+        self.host = User.objects.create_user(username='host')
+        self.sessions = [
+            StudySession.objects.create(
+                title=f'Session {idx}', course_code='CS101', description='Session', date='', time='',
+                location='Lab', host=self.host,
+            )
+            for idx in range(5)
+        ]
+
+    def badges(self, user):
+        return set(Badge.objects.filter(user=user).values_list('name', flat=True))
+
+    def test_xp_threshold_awarded_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            award_xp(self.user, 450, 'seed')
+        self.assertEqual(self.badges(self.user), set())
+        with self.captureOnCommitCallbacks(execute=True):
+            award_xp(self.user, 50, 'create_session')
+        with self.captureOnCommitCallbacks(execute=True):
+            award_xp(self.user, 50, 'create_session')
+        self.assertEqual(self.badges(self.user), {'Rising Star'})
+
+    def test_counter_thresholds_from_endpoints(self):
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/sessions/bulk_rsvp/', {'ids': [s.id for s in self.sessions[:4]]}, format='json')
+        self.assertEqual(self.badges(self.user), set())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/sessions/{self.sessions[4].id}/rsvp/')
+            self.client.post('/api/groups/', {'name': 'Mine', 'subject': 'CS101', 'description': 'Mine'})
+        self.assertEqual(self.badges(self.user), {'Study Buddy', 'Initiator'})
+        self.assertEqual(UserStats.objects.get(pk=self.user.pk).groups_created, 1)
+
+    def test_check_is_a_single_lookup(self):
+        award_xp(self.user, 600, 'seed')
+        with self.captureOnCommitCallbacks() as callbacks:
+            award_xp(self.user, 10, 'rsvp_session')
+        # The lookup of missing badges, then their insert
+        self.assertNumQueries(2, callbacks[-1])
+        # Already held: only the lookup runs
+        self.assertNumQueries(1, callbacks[-1])
+
+    def test_backfill_evaluates_every_rule(self):
+        veteran = User.objects.create_user(username='veteran', xp=2500)
+        for session in self.sessions:
+            SessionRSVP.objects.create(user=veteran, session=session)
+        # Counters lost, as if written by raw SQL
+        UserStats.objects.filter(pk=veteran.pk).delete()
+        out = StringIO()
+        call_command('award_badges', stdout=out)
+        self.assertIn('Awarded 4 badges', out.getvalue())
+        self.assertEqual(self.badges(veteran), {'Rising Star', 'Knowledge Seeker', 'Study Buddy'})
+        self.assertEqual(self.badges(self.host), {'Session Host'})
+        call_command('award_badges', stdout=out)
+        self.assertIn('Awarded 0 badges', out.getvalue())
+
+
+
+class AutocommitBadgeTests(TransactionTestCase):
+    """Outside atomic() the check runs at once, so it must see the counter it follows"""
+
+    def test_fifth_rsvp_awards_study_buddy(self):
+        user = User.objects.create_user(username='student')
+        host = User.objects.create_user(username='host')
+        for idx in range(5):
+            session = StudySession.objects.create(
+                title=f'Session {idx}', course_code='CS101', description='Session', date='', time='',
+                location='Lab', host=host,
+            )
+            SessionRSVP.objects.create(user=user, session=session)
+        self.assertEqual(UserStats.objects.get(pk=user.pk).sessions_attended, 5)
+        self.assertTrue(Badge.objects.filter(user=user, name='Study Buddy').exists())
+
+
+class AdminOverviewTests(StudySphereTestCase):
+    """The moderation overview is paginated per status with aggregate stats"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(username='admin', is_staff=True)
+        self.creator = User.objects.create_user(username='creator')
+        StudyGroup.objects.bulk_create(
+            [StudyGroup(name=f'Pending {idx}', subject='CS101', description='Group', creator=self.creator)
+             for idx in range(55)]
+            + [StudyGroup(name=f'Approved {idx}', subject='CS101', description='Group', creator=self.creator,
+                          status='approved') for idx in range(3)]
+            + [StudyGroup(name='Rejected', subject='CS101', description='Group', creator=self.creator,
+                          status='rejected')]
+        )
+        sessions = StudySession.objects.bulk_create([
+            StudySession(title=f'Session {idx}', course_code='CS101', description='Session', date='', time='',
+                         location='Lab', host=self.creator)
+            for idx in range(4)
+        ])
+        SessionRSVP.objects.create(user=self.creator, session=sessions[0])
+        SessionRSVP.objects.create(user=self.admin, session=sessions[0])
+        SessionRSVP.objects.create(user=self.admin, session=sessions[1])
+        self.client.force_authenticate(self.admin)
+
+    def test_overview_stats_and_first_pages(self):
+        response = self.client.get('/api/admin/groups/')
+        self.assertEqual(response.data['stats'], {
+            'total_groups': 59, 'pending_groups': 55, 'approved_groups': 3, 'rejected_groups': 1,
+            'total_sessions': 4, 'active_sessions': 2,
+        })
+        self.assertEqual(len(response.data['pending']), 50)
+        self.assertEqual(len(response.data['approved']), 3)
+        self.assertIsNone(response.data['next']['approved'])
+        self.assertIn('status=pending', response.data['next']['pending'])
+
+    def test_overview_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/admin/groups/')
+        # A page and a member preview per bucket, plus the two aggregates
+        self.assertEqual(len(ctx.captured_queries), 8)
+
+    def test_status_bucket_pages(self):
+        first = self.client.get('/api/admin/groups/')
+        response = self.client.get(first.data['next']['pending'])
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['next'])
+        names = {row['name'] for row in first.data['pending']} | {row['name'] for row in response.data['results']}
+        self.assertEqual(len(names), 55)
+
+    def test_unknown_status(self):
+        response = self.client.get('/api/admin/groups/?status=archived')
+        self.assertEqual(response.status_code, 400)
+
+
+class ResponseCacheTests(StudySphereTestCase):
+    """Anonymous reads are cached until a write bumps the collection version"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='host')
+        self.group = StudyGroup.objects.create(
+            name='Group', subject='CS101', description='Group', creator=self.user
+        )
+        self.session = StudySession.objects.create(
+            title='Session', course_code='CS101', description='Session', date='', time='',
+            location='Lab', host=self.user,
+        )
+
+    def get(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_second_anonymous_read_is_served_from_cache(self):
+        before = response_cache_stats()
+        self.assertEqual(self.get('/api/sessions/', 4)['X-Cache'], 'MISS')
+        response = self.get('/api/sessions/', 0)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.json()['count'], 1)
+        after = response_cache_stats()
+        self.assertEqual((after['hits'] - before['hits'], after['misses'] - before['misses']), (1, 1))
+        # Query strings are part of the key
+        self.assertEqual(self.get('/api/sessions/?page=1', 4)['X-Cache'], 'MISS')
+
+    def test_authenticated_reads_bypass_cache(self):
+        self.get('/api/sessions/', 4)
+        self.client.force_authenticate(self.user)
+        response = self.get('/api/sessions/', 4)
+        self.assertNotIn('X-Cache', response)
+
+    def test_rsvp_invalidates_sessions(self):
+        self.get('/api/sessions/', 4)
+        other = User.objects.create_user(username='other')
+        self.client.force_authenticate(other)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/sessions/{self.session.id}/rsvp/')
+        self.client.force_authenticate(None)
+        response = self.get('/api/sessions/', 4)
+        self.assertEqual(response.data['results'][0]['attendees_count'], 1)
+
+    def test_award_xp_invalidates_leaderboard(self):
+        self.get('/api/leaderboard/?period=all', 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            award_xp(self.user, 50, 'create_session')
+        response = self.get('/api/leaderboard/?period=all', 2)
+        self.assertEqual(response.data[0]['xp'], 50)
+
+    def test_approve_invalidates_groups(self):
+        self.assertEqual(self.get('/api/groups/', 2).data['count'], 0)
+        admin = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_authenticate(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/admin/groups/{self.group.id}/approve/')
+        self.client.force_authenticate(None)
+        self.assertEqual(self.get('/api/groups/', 4).data['count'], 1)
+
+    def test_file_based_cache(self):
+        with TemporaryDirectory() as location:
+            caches = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                  'LOCATION': location}}
+            with override_settings(CACHES=caches):
+                self.get('/api/sessions/', 4)
+                self.assertEqual(self.get('/api/sessions/', 0)['X-Cache'], 'HIT')
+                with self.captureOnCommitCallbacks(execute=True):
+                    award_xp(self.user, 10, 'rsvp_session')
+                    self.client.force_authenticate(self.user)
+                    self.client.patch(f'/api/sessions/{self.session.id}/', {'location': 'Library'})
+                    self.client.force_authenticate(None)
+                response = self.get('/api/sessions/', 4)
+                self.assertEqual(response.data['results'][0]['location'], 'Library')
+
+
+class ConditionalGetTests(StudySphereTestCase):
+    """Matching validators get a 304 without running the page query"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='host')
+        self.session = StudySession.objects.create(
+            title='Session', course_code='CS101', description='Session', date='', time='',
+            location='Lab', host=self.user,
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_if_none_match(self):
+        response = self.client.get('/api/sessions/')
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        # Only the validator aggregate runs
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/sessions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_rsvp_changes_etag(self):
+        etag = self.client.get('/api/sessions/')['ETag']
+        other = User.objects.create_user(username='other')
+        # The RSVP signal bumps the sessions version
+        with self.captureOnCommitCallbacks(execute=True):
+            SessionRSVP.objects.create(user=other, session=self.session)
+        response = self.client.get('/api/sessions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['attendees_count'], 1)
+
+    def test_etag_is_per_user(self):
+        etag = self.client.get('/api/sessions/')['ETag']
+        self.client.force_authenticate(None)
+        response = self.client.get('/api/sessions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_if_modified_since(self):
+        response = self.client.get(f'/api/sessions/{self.session.id}/')
+        last_modified = response['Last-Modified']
+        response = self.client.get(f'/api/sessions/{self.session.id}/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(CONDITIONAL_VERSION_VALIDATORS=True)
+    def test_version_validators_skip_the_aggregate(self):
+        etag = self.client.get('/api/sessions/')['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/sessions/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/sessions/{self.session.id}/rsvp/')
+        self.assertEqual(self.client.get('/api/sessions/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_queryset_update_changes_list_etag(self):
+        etag = self.client.get('/api/sessions/')['ETag']
+        # Bypasses signals and cache versions; the aggregate still sees the new updated_at
+        StudySession.objects.filter(pk=self.session.pk).update(
+            location='Library', updated_at=self.session.updated_at + timedelta(seconds=1))
+        self.assertEqual(self.client.get('/api/sessions/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_non_numeric_id_is_not_found(self):
+        self.assertEqual(self.client.get('/api/sessions/abc/').status_code, 404)
+        self.assertEqual(self.client.get('/api/groups/abc/').status_code, 404)
+
+    def test_direct_save_changes_list_etag(self):
+        etag = self.client.get('/api/sessions/')['ETag']
+        # Admin and shell writes bypass the views, so the save signal bumps the version
+        self.session.location = 'Library'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session.save()
+        self.assertEqual(self.client.get('/api/sessions/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_anonymous_cache_hit_revalidates_without_queries(self):
+        self.client.force_authenticate(None)
+        etag = self.client.get('/api/groups/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/groups/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_leaderboard_etag_follows_xp(self):
+        etag = self.client.get('/api/leaderboard/?period=all')['ETag']
+        self.assertEqual(self.client.get('/api/leaderboard/?period=all', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            award_xp(self.user, 10, 'rsvp_session')
+        self.assertEqual(self.client.get('/api/leaderboard/?period=all', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class SearchTests(StudySphereTestCase):
+    """Search must rank matches and stay in step with writes"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='searcher', password='password123')
+        self.title_match = StudySession.objects.create(
+            title='Graph algorithms review', course_code='CS201', description='Bring notes',
+            date='October 22', time='8:00 AM - 10:00 AM', location='Lab', host=self.user,
+        )
+        self.body_match = StudySession.objects.create(
+            title='Midterm prep', course_code='CS202', description='Covers graph traversal',
+            date='October 23', time='8:00 AM - 10:00 AM', location='Lab', host=self.user,
+        )
+        self.group = StudyGroup.objects.create(
+            name='Graph theory circle', subject='MATH301', description='Weekly', creator=self.user, status='approved'
+        )
+        # Authenticated reads bypass the response cache, so direct model writes show up immediately
+        self.client.force_authenticate(self.user)
+
+    def search(self, query):
+        response = self.client.get('/api/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_title_ranks_above_description(self):
+        results = self.search('graph').data['results']
+        self.assertEqual(len(results), 3)
+        session_ids = [row['id'] for row in results if row['type'] == 'session']
+        self.assertEqual(session_ids, [self.title_match.id, self.body_match.id])
+        sessions = [row['object'] for row in results if row['type'] == 'session']
+        self.assertEqual(sessions[0]['title'], 'Graph algorithms review')
+
+    def test_prefix_and_course_code(self):
+        self.assertEqual(self.search('algo').data['count'], 1)
+        results = self.search('math301').data['results']
+        self.assertEqual([(row['type'], row['id']) for row in results], [('group', self.group.id)])
+
+    def test_type_filter(self):
+        response = self.client.get('/api/search/', {'q': 'graph', 'type': 'group'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'graph', 'type': 'user'}).status_code, 400)
+
+    def test_unapproved_groups_are_not_searchable(self):
+        self.group.status = 'rejected'
+        self.group.save()
+        self.assertEqual(self.client.get('/api/search/', {'q': 'circle'}).data['count'], 0)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.title_match.title = 'Dynamic programming'
+        self.title_match.save()
+        self.assertEqual(self.search('dynamic').data['count'], 1)
+        self.assertEqual(self.search('algorithms').data['count'], 0)
+        self.title_match.delete()
+        self.assertEqual(self.search('dynamic').data['count'], 0)
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('"graph* ^(').data['count'], 3)
+        self.assertEqual(self.search('!!!').data['count'], 0)
+
+    def test_query_count(self):
+        # Search COUNT, ranked page, sessions with attendees prefetch, groups with member preview
+        with self.assertNumQueries(6):
+            self.search('graph')
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM search_index')
+        self.assertEqual(self.search('graph').data['count'], 0)
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('graph').data['count'], 3)
+        # Batches that split the rows still index every one of them
+        call_command('rebuild_search_index', batch_size=2, stdout=StringIO())
+        self.assertEqual(self.search('graph').data['count'], 3)
+
+
+class FilterTests(StudySphereTestCase):
+    """List filters are applied in SQL and served from the matching indexes"""
+
+    def setUp(self):
+        super().setUp()
+        self.host = User.objects.create_user(username='host')
+        self.other = User.objects.create_user(username='other')
+        self.group = StudyGroup.objects.create(
+            name='Algorithms', subject='23CS3PCDST', description='Group', creator=self.host, status='approved'
+        )
+        StudyGroup.objects.create(name='Pending', subject='23CS3PCDST', description='Group', creator=self.other)
+        StudyGroup.objects.create(
+            name='Maths', subject='23MA3BSSDM', description='Group', creator=self.other, status='approved'
+        )
+        for idx, (course_code, host, group) in enumerate([
+            ('23CS3PCDST', self.host, self.group),
+            ('23CS3PCDST', self.other, None),
+            ('23MA3BSSDM', self.host, None),
+        ]):
+            StudySession.objects.create(
+                title=f'Session {idx}', course_code=course_code, description='Session', date='', time='',
+                location='Lab', host=host, group=group,
+            )
+
+    def titles(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return sorted(row.get('title') or row.get('name') for row in response.data['results'])
+
+    def test_session_filters(self):
+        self.assertEqual(self.titles('/api/sessions/?course_code=23CS3PCDST'), ['Session 0', 'Session 1'])
+        self.assertEqual(self.titles(f'/api/sessions/?host={self.host.id}'), ['Session 0', 'Session 2'])
+        self.assertEqual(self.titles(f'/api/sessions/?group={self.group.id}'), ['Session 0'])
+        self.assertEqual(self.titles('/api/sessions/?subject=23CS3PCDST&status=approved'), ['Session 0'])
+        self.assertEqual(
+            self.titles(f'/api/sessions/?course_code=23CS3PCDST&host={self.host.id}'), ['Session 0']
+        )
+
+    def test_group_filters(self):
+        self.assertEqual(self.titles('/api/groups/?subject=23CS3PCDST'), ['Algorithms'])
+        self.assertEqual(self.titles('/api/groups/?course_code=23MA3BSSDM'), ['Maths'])
+        self.assertEqual(self.titles(f'/api/groups/?host={self.other.id}'), ['Maths'])
+        # Filters narrow, never widen, what a non-staff user may see
+        self.assertEqual(self.titles('/api/groups/?status=pending'), [])
+        self.client.force_authenticate(User.objects.create_user(username='staff', is_staff=True))
+        self.assertEqual(self.titles('/api/groups/?status=pending'), ['Pending'])
+
+    def test_invalid_id(self):
+        self.assertEqual(self.client.get('/api/sessions/?host=me').status_code, 400)
+
+    def assertUsesIndex(self, url, index):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        # The page query is the one selecting the annotated rows
+        page = next(
+            query['sql'] for query in ctx.captured_queries
+            if 'attendees_count' in query['sql'] or 'members_count' in query['sql']
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {page}')
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn(index, plan)
+
+    def test_query_plans_use_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan text is SQLite specific')
+        self.assertUsesIndex('/api/sessions/?course_code=23CS3PCDST', 'session_course_idx')
+        self.assertUsesIndex(f'/api/sessions/?host={self.host.id}', 'session_host_idx')
+        self.assertUsesIndex('/api/groups/?subject=23CS3PCDST', 'group_subject_idx')
+
+
+class BulkEnrollmentTests(StudySphereTestCase):
+    """Bulk RSVP/join insert in one statement and award XP once"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='planner')
+        host = User.objects.create_user(username='host')
+        self.sessions = [
+            StudySession.objects.create(
+                title=f'Session {idx}', course_code='CS101', description='Session', date='', time='',
+                location='Lab', host=host,
+            )
+            for idx in range(4)
+        ]
+        self.groups = [
+            StudyGroup.objects.create(
+                name=f'Group {idx}', subject='CS101', description='Group', creator=host, status=status
+            )
+            for idx, status in enumerate(['approved', 'approved', 'pending'])
+        ]
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_rsvp(self):
+        SessionRSVP.objects.create(user=self.user, session=self.sessions[0])
+        ids = [session.id for session in self.sessions] + [999999]
+        response = self.client.post('/api/sessions/bulk_rsvp/', {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['status'] for row in response.data['results']],
+                         ['already_attending', 'created', 'created', 'created', 'not_found'])
+        self.assertEqual(response.data['xp_earned'], 30)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.xp, 30)
+        self.assertEqual(XPEvent.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(SessionRSVP.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(UserStats.objects.get(pk=self.user.pk).sessions_attended, 4)
+
+    def test_bulk_rsvp_query_count_is_constant(self):
+        ids = [session.id for session in self.sessions]
+        # The first RSVP builds the UserStats row
+        self.client.post('/api/sessions/bulk_rsvp/', {'ids': ids[:1]}, format='json')
+        with CaptureQueriesContext(connection) as small:
+            self.client.post('/api/sessions/bulk_rsvp/', {'ids': ids[1:2]}, format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post('/api/sessions/bulk_rsvp/', {'ids': ids[2:]}, format='json')
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_bulk_join(self):
+        ids = [group.id for group in self.groups]
+        response = self.client.post('/api/groups/bulk_join/', {'ids': ids + ids[:1]}, format='json')
+        self.assertEqual([row['status'] for row in response.data['results']], ['created', 'created', 'not_found'])
+        self.assertEqual(response.data['xp_earned'], 50)
+        response = self.client.post('/api/groups/bulk_join/', {'ids': ids[:1]}, format='json')
+        self.assertEqual(response.data['results'], [{'id': ids[0], 'status': 'already_member'}])
+        self.assertEqual(response.data['xp_earned'], 0)
+        self.assertEqual(UserStats.objects.get(pk=self.user.pk).groups_joined, 2)
+
+    def test_concurrent_rsvp_is_not_counted_twice(self):
+        ids = [session.id for session in self.sessions[:2]]
+
+        def racing_insert(model, user, key, missing, stamp):
+            # A single RSVP commits between the lookup and the bulk insert
+            SessionRSVP.objects.create(user=user, session_id=missing[0])
+            return insert_missing(model, user, key, missing, stamp)
+
+        with mock.patch('api.views.insert_missing', side_effect=racing_insert):
+            response = self.client.post('/api/sessions/bulk_rsvp/', {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['status'] for row in response.data['results']], ['already_attending', 'created'])
+        self.assertEqual(response.data['xp_earned'], 10)
+        self.assertEqual(SessionRSVP.objects.filter(user=self.user).count(), 2)
+
+    def test_invalid_ids(self):
+        for payload in [{}, {'ids': []}, {'ids': ['1']}, {'ids': list(range(1, 100))}]:
+            response = self.client.post('/api/sessions/bulk_rsvp/', payload, format='json')
+            self.assertEqual(response.status_code, 400)
+
+
+class IdempotentEnrollmentTests(StudySphereTestCase):
+    """RSVP/join insert once and Idempotency-Key retries replay the first response"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='clicker')
+        host = User.objects.create_user(username='host')
+        self.session = StudySession.objects.create(
+            title='Session', course_code='CS101', description='Session', date='', time='',
+            location='Lab', host=host,
+        )
+        self.group = StudyGroup.objects.create(
+            name='Group', subject='CS101', description='Group', creator=host, status='approved'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_duplicate_rsvp_is_rejected_by_the_constraint(self):
+        self.assertEqual(self.client.post(f'/api/sessions/{self.session.id}/rsvp/').status_code, 201)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(f'/api/sessions/{self.session.id}/rsvp/')
+        # No exists() pre-check: the session lookup, then the insert that fails
+        reads = [query['sql'] for query in ctx.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertFalse(any('session_rsvps' in sql for sql in reads))
+        self.assertEqual(response.status_code, 400)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.xp, 10)
+
+    def test_retry_with_key_replays_response(self):
+        url = f'/api/sessions/{self.session.id}/rsvp/'
+        first = self.client.post(url, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(first.status_code, 201)
+        # Only the cache lookup runs: no lookups, inserts or XP writes
+        with self.assertNumQueries(0):
+            retry = self.client.post(url, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(XPEvent.objects.filter(user=self.user).count(), 1)
+
+    def test_keys_are_scoped_to_user_and_endpoint(self):
+        self.client.post(f'/api/sessions/{self.session.id}/rsvp/', HTTP_IDEMPOTENCY_KEY='abc')
+        response = self.client.post(f'/api/groups/{self.group.id}/join/', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, 201)
+        self.client.force_authenticate(User.objects.create_user(username='other'))
+        response = self.client.post(f'/api/sessions/{self.session.id}/rsvp/', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(SessionRSVP.objects.filter(session=self.session).count(), 2)
+
+    def test_key_in_progress_conflicts(self):
+        request = SimpleNamespace(method='POST', path=f'/api/groups/{self.group.id}/join/', user=self.user)
+        cache.set(idempotency_cache_key(request, 'abc'), IN_PROGRESS)
+        response = self.client.post(f'/api/groups/{self.group.id}/join/', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(GroupMembership.objects.filter(user=self.user).exists())
+
+
+class AsyncReadTests(StudySphereTestCase):
+    """Hot read endpoints are served by async handlers through the ASGI stack"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='async')
+        self.session = StudySession.objects.create(
+            title='Session', course_code='CS101', description='Session', date='', time='',
+            location='Lab', host=self.user, starts_at=timezone.now() + timedelta(days=1),
+        )
+        SessionRSVP.objects.create(user=self.user, session=self.session)
+        self.token = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+
+    def test_read_routes_are_async(self):
+        for url in ['/api/sessions/', f'/api/sessions/{self.session.id}/', '/api/groups/',
+                    '/api/leaderboard/', '/api/dashboard/']:
+            self.assertTrue(asyncio.iscoroutinefunction(resolve(url).func), url)
+
+    async def test_asgi_list_and_detail(self):
+        response = await self.async_client.get('/api/sessions/', headers={'Authorization': self.token})
+        self.assertEqual(response.status_code, 200)
+        row = response.json()['results'][0]
+        self.assertEqual((row['attendees_count'], row['is_attending']), (1, True))
+        self.assertIn('ETag', response)
+
+        url = f'/api/sessions/{self.session.id}/'
+        response = await self.async_client.get(url)
+        self.assertEqual(response.json()['title'], 'Session')
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual((await self.async_client.get('/api/sessions/999999/')).status_code, 404)
+        self.assertEqual((await self.async_client.get('/api/sessions/?page=9')).status_code, 404)
+
+    async def test_asgi_dashboard(self):
+        self.assertEqual((await self.async_client.get('/api/dashboard/')).status_code, 401)
+        response = await self.async_client.get('/api/dashboard/', headers={'Authorization': self.token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['stats']['sessions_attended'], 1)
+        self.assertEqual(response.json()['upcoming_sessions'][0]['id'], self.session.id)
+
+    async def test_writes_fall_through_to_drf(self):
+        response = await self.async_client.post(
+            '/api/sessions/', {'title': 'New', 'course_code': 'CS102', 'description': 'x',
+                               'date': 'October 22', 'time': '8:00 AM - 10:00 AM', 'location': 'Lab'},
+            content_type='application/json', headers={'Authorization': self.token}
+        )
+        self.assertEqual(response.status_code, 201)
+
+
+class PerformanceMetricsTests(StudySphereTestCase):
+    """Requests carry Server-Timing and feed the admin-only Prometheus endpoint"""
+
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        self.user = User.objects.create_user(username='metered')
+        self.session = StudySession.objects.create(
+            title='Session', course_code='CS101', description='Session', date='', time='',
+            location='Lab', host=self.user,
+        )
+
+    def test_server_timing(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/sessions/')
+        timing = dict(part.strip().split(';', 1) for part in response['Server-Timing'].split(','))
+        self.assertEqual(set(timing), {'db', 'serializer', 'view'})
+        # Same queries the query-count tests expect for this list
+        self.assertIn('desc="4 queries"', timing['db'])
+
+    def test_metrics_endpoint(self):
+        self.client.get('/api/sessions/')
+        self.client.get(f'/api/sessions/{self.session.id}/')
+        self.assertEqual(self.client.get('/api/_metrics').status_code, 401)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/_metrics').status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_user(username='ops', is_staff=True))
+        response = self.client.get('/api/_metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('studysphere_request_duration_seconds_count{route="api/sessions/",method="GET"} 1', body)
+        self.assertIn('route="api/sessions/<int:pk>/"', body)
+        self.assertIn('studysphere_request_queries_bucket', body)
+        self.assertIn('studysphere_response_cache_requests_total{outcome="misses"}', body)
+
+    @override_settings(METRICS_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_only_record_latency(self):
+        response = self.client.get('/api/sessions/')
+        self.assertNotIn('Server-Timing', response)
+        body = registry.render()
+        self.assertIn('studysphere_request_duration_seconds_count{route="api/sessions/",method="GET"} 1', body)
+        self.assertNotIn('studysphere_request_queries_count', body)
+
+
+class RecommendationTests(StudySphereTestCase):
+    """Recommendations are built offline from co-membership and served in one query"""
+
+    def setUp(self):
+        super().setUp()
+        self.reader, self.peer, self.loner = [
+            User.objects.create_user(username=name) for name in ('reader', 'peer', 'loner')
+        ]
+        self.shared, self.peers_group, self.other_course, self.pending = [
+            StudyGroup.objects.create(name=name, subject=subject, description=name, creator=self.loner, status=status)
+            for name, subject, status in [
+                ('Shared', 'CS101', 'approved'), ('Peers', 'CS101', 'approved'),
+                ('Elsewhere', 'MA201', 'approved'), ('Pending', 'CS101', 'pending'),
+            ]
+        ]
+        now = timezone.now()
+        self.upcoming, self.past = [
+            StudySession.objects.create(
+                title=title, course_code='CS101', description=title, date='', time='', location='Lab',
+                host=self.loner, starts_at=starts_at,
+            )
+            for title, starts_at in [('Upcoming', now + timedelta(days=2)), ('Past', now - timedelta(days=2))]
+        ]
+        for user, group in [
+            (self.reader, self.shared), (self.peer, self.shared), (self.peer, self.peers_group),
+            (self.peer, self.other_course), (self.peer, self.pending),
+        ]:
+            GroupMembership.objects.create(user=user, group=group)
+        for user, session in [(self.peer, self.upcoming), (self.peer, self.past), (self.reader, self.past)]:
+            SessionRSVP.objects.create(user=user, session=session)
+        call_command('build_recommendations', stdout=StringIO())
+
+    def recommendations(self, user):
+        self.client.force_authenticate(user)
+        # The stored rows with their group or session, and nothing else
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/recommendations/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_co_members_items_ranked_by_course_overlap(self):
+        data = self.recommendations(self.reader)
+        # Never the reader's own group, a pending group or a past session
+        self.assertEqual([group['name'] for group in data['groups']], ['Peers', 'Elsewhere'])
+        self.assertGreater(data['groups'][0]['score'], data['groups'][1]['score'])
+        self.assertEqual([session['title'] for session in data['sessions']], ['Upcoming'])
+
+    def test_stale_rows_are_skipped_until_rebuilt(self):
+        GroupMembership.objects.create(user=self.reader, group=self.peers_group)
+        SessionRSVP.objects.create(user=self.reader, session=self.upcoming)
+        self.other_course.status = 'rejected'
+        self.other_course.save()
+        self.assertEqual(self.recommendations(self.reader), {'groups': [], 'sessions': []})
+
+    def test_top_k_and_rebuild_replaces(self):
+        call_command('build_recommendations', '--top-k', '1', stdout=StringIO())
+        data = self.recommendations(self.reader)
+        self.assertEqual([group['name'] for group in data['groups']], ['Peers'])
+        self.assertEqual(len(data['sessions']), 1)
+        self.assertEqual(self.recommendations(self.loner), {'groups': [], 'sessions': []})
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get('/api/recommendations/').status_code, 401)
+
+    def test_read_uses_user_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Plan text is SQLite specific')
+        sql, params = Recommendation.objects.for_user(self.reader).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('recommendation_user_idx', plan)
+
+
+class ScaleSeedTests(StudySphereTestCase):
+    """seed --scale writes consistent, deterministic synthetic data"""
+
+    def seed(self, scale, seed=0):
+        call_command('seed', scale=scale, seed=seed, stdout=StringIO())
+        return list(User.objects.filter(is_staff=False).order_by('username').values_list('username', 'xp', 'level'))
+
+    def test_generates_rows_in_proportion(self):
+        self.seed(100)
+        self.assertEqual(User.objects.filter(is_staff=False).count(), 100)
+        self.assertTrue(User.objects.get(username='admin').is_superuser)
+        self.assertEqual(StudyGroup.objects.count(), 10)
+        self.assertEqual(StudySession.objects.count(), 50)
+        self.assertEqual(SessionRSVP.objects.count(), 500)
+        self.assertEqual(GroupMembership.objects.count(), 100 * min(2, StudyGroup.objects.filter(status='approved').count()))
+        self.assertFalse(GroupMembership.objects.exclude(group__status='approved').exists())
+
+        user = User.objects.get(username='user7')
+        self.assertTrue(user.check_password('password123'))
+        self.assertEqual(user.level, calculate_level(user.xp))
+        # Rollups match the XP events they were written with
+        week = sum(XPRollup.objects.filter(period='week').values_list('xp', flat=True))
+        self.assertEqual(week, sum(XPEvent.objects.values_list('amount', flat=True)))
+        self.assertEqual(self.client.get('/api/search/?q=review').data['count'], 50)
+
+        # New rows after the explicit primary keys still get fresh ones
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.post('/api/sessions/', {
+            'title': 'After seeding', 'course_code': 'CS101', 'description': 'x',
+            'date': 'October 22', 'time': '8:00 AM', 'location': 'Lab',
+        }).status_code, 201)
+
+    def test_same_seed_same_data(self):
+        first = self.seed(30, seed=4)
+        self.assertEqual(self.seed(30, seed=4), first)
+        self.assertNotEqual(self.seed(30, seed=5), first)
+        self.assertEqual(User.objects.count(), 31)
+
+
+class BenchmarkSuiteTests(TransactionTestCase):
+    """The benchmark package can drive every endpoint against a tiny dataset"""
+
+    def setUp(self):
+        # Committed rows, since the login benchmark authenticates on a hasher pool thread
+        cache.clear()
+        rank_index.reconcile()
+
+    def test_every_endpoint_runs(self):
+        from benchmarks.datasets import build_dataset
+        from benchmarks.endpoints import ENDPOINTS
+        from benchmarks.runner import run_benchmarks
+
+        results = run_benchmarks(build_dataset(200), iterations=2)
+        self.assertEqual(list(results), [endpoint.name for endpoint in ENDPOINTS])
+        for name, row in results.items():
+            self.assertIsNotNone(row, name)
+            self.assertTrue(all(code < 400 for code in row['status']), (name, row['status']))
+            self.assertLessEqual(row['p50'], row['p95'])
+
+    def test_compare_flags_regressions(self):
+        from benchmarks.runner import compare
+
+        baseline = {'sessions list': {'p50': 5.0, 'p95': 10.0, 'p99': 12.0, 'queries': 4}}
+        steady = {'sessions list': {'p50': 5.0, 'p95': 11.0, 'p99': 12.0, 'queries': 4}}
+        self.assertEqual(compare(steady, baseline), [])
+        slower = {'sessions list': {'p50': 9.0, 'p95': 20.0, 'p99': 22.0, 'queries': 5}}
+        self.assertEqual([name for name, _ in compare(slower, baseline)], ['sessions list', 'sessions list'])
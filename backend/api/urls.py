@@ -4,17 +4,38 @@ from .views import (
     StudySessionViewSet,
     StudyGroupViewSet,
     LeaderboardViewSet,
+    SearchViewSet,
+    RecommendationViewSet,
     DashboardViewSet,
-    AdminViewSet
+    AdminViewSet,
+    MetricsView
 )
+from .async_views import AsyncDashboardRead, AsyncLeaderboardRead, async_read_view
 
 router = routers.DefaultRouter()
 router.register(r'sessions', StudySessionViewSet, basename='session')
 router.register(r'groups', StudyGroupViewSet, basename='group')
 router.register(r'leaderboard', LeaderboardViewSet, basename='leaderboard')
+router.register(r'search', SearchViewSet, basename='search')
+router.register(r'recommendations', RecommendationViewSet, basename='recommendation')
 router.register(r'dashboard', DashboardViewSet, basename='dashboard')
 router.register(r'admin/groups', AdminViewSet, basename='admin')
 
-urlpatterns = [
+LIST_ACTIONS = {'get': 'list', 'post': 'create'}
+DETAIL_ACTIONS = {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}
+
+# Hot read endpoints get async GET handlers; these shadow the router's routes for the
+# same URLs and pass every other method on to the viewset
+async_urlpatterns = [
+    path('sessions/', async_read_view(StudySessionViewSet, LIST_ACTIONS)),
+    path('sessions/<int:pk>/', async_read_view(StudySessionViewSet, DETAIL_ACTIONS)),
+    path('groups/', async_read_view(StudyGroupViewSet, LIST_ACTIONS)),
+    path('groups/<int:pk>/', async_read_view(StudyGroupViewSet, DETAIL_ACTIONS)),
+    path('leaderboard/', async_read_view(LeaderboardViewSet, {'get': 'list'}, AsyncLeaderboardRead)),
+    path('dashboard/', async_read_view(DashboardViewSet, {'get': 'list'}, AsyncDashboardRead)),
+]
+
+urlpatterns = async_urlpatterns + [
+    path('_metrics', MetricsView.as_view(), name='metrics'),
     path('', include(router.urls)),
 ]
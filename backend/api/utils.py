@@ -1,4 +1,16 @@
 """Utility functions for XP and leveling system"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, ExpressionWrapper, F, IntegerField, Q, Value, When
+from django.db.models.functions import Now
+from django.db.models.lookups import LessThan
+from django.utils import timezone
+
+from .cache import bump_profile_version, bump_user_version, bump_version
+from .badges import check_badges
+from .models import User, XPEvent, XPRollup
+from .rank_index import xp_awarded
 
 
 def calculate_level(xp):
@@ -15,11 +27,78 @@ def calculate_level(xp):
         return 5 + (xp - 2000) // 1000
 
 
-def award_xp(user, amount):
-    """Award XP to a user and update their level"""
-    user.xp += amount
-    user.level = calculate_level(user.xp)
-    user.save()
+def bucket_start(period, day):
+    """Return the first date of the day/week/month bucket containing day"""
+    if period == 'day':
+        return day
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    raise ValueError(f"Unknown XP rollup period: {period}")
+
+
+def level_expression(xp):
+    """Database expression mirroring calculate_level for an integer XP expression"""
+    return Case(
+        When(LessThan(xp, 500), then=Value(1)),
+        When(LessThan(xp, 1000), then=Value(2)),
+        When(LessThan(xp, 1500), then=Value(3)),
+        When(LessThan(xp, 2000), then=Value(4)),
+        default=ExpressionWrapper(5 + (xp - 2000) / 1000, output_field=IntegerField()),
+        output_field=IntegerField(),
+    )
+
+
+def _increment_rollups(user_ids, amount, day):
+    """Add amount to the day/week/month rollups of every user in user_ids"""
+    buckets = [(period, bucket_start(period, day)) for period, _ in XPRollup.PERIOD_CHOICES]
+    # Make sure every row exists first so the increment below is a single UPDATE
+    XPRollup.objects.bulk_create([
+        XPRollup(user_id=user_id, period=period, bucket_start=start, xp=0)
+        for user_id in user_ids
+        for period, start in buckets
+    ], ignore_conflicts=True)
+
+    in_buckets = Q()
+    for period, start in buckets:
+        in_buckets |= Q(period=period, bucket_start=start)
+    XPRollup.objects.filter(in_buckets, user_id__in=user_ids).update(xp=F('xp') + amount)
+
+
+@transaction.atomic
+def award_xp_bulk(user_ids, amount, reason=''):
+    """Award the same XP to many users with one UPDATE and record it in the XP ledger"""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return 0
+
+    new_xp = F('xp') + amount
+    updated = User.objects.filter(pk__in=user_ids).update(
+        xp=new_xp, level=level_expression(new_xp), updated_at=Now()
+    )
+
+    now = timezone.now()
+    XPEvent.objects.bulk_create([
+        XPEvent(user_id=user_id, amount=amount, reason=reason, created_at=now)
+        for user_id in user_ids
+    ])
+    _increment_rollups(user_ids, amount, timezone.localdate(now))
+    bump_version('leaderboard')
+    bump_user_version(*user_ids)
+    bump_profile_version(*user_ids)
+    xp_awarded(user_ids, amount)
+    if amount > 0:
+        check_badges(user_ids, ['xp'])
+    return updated
+
+
+def award_xp(user, amount, reason=''):
+    """Award XP to a user, update their level and record it in the XP ledger"""
+    # XP and level are computed in the database so concurrent awards are never lost
+    # and the rest of the users row is left untouched.
+    award_xp_bulk([user.pk], amount, reason)
+    user.refresh_from_db(fields=['xp', 'level'])
     return user
 
 
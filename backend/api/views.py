@@ -2,59 +2,212 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import NotAuthenticated, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+from django.conf import settings
+from django.http import HttpResponse
 from django.utils import timezone
-from datetime import timedelta
-from django.db.models import Count, Q
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Q
 
-from .models import User, StudySession, StudyGroup, SessionRSVP, GroupMembership
+from .models import User, StudySession, StudyGroup, SessionRSVP, GroupMembership, XPRollup, Recommendation
 from .serializers import (
     StudySessionSerializer, StudySessionCreateSerializer,
     StudyGroupSerializer, StudyGroupCreateSerializer,
-    LeaderboardSerializer, UserProfileSerializer
+    LeaderboardSerializer, UserProfileSerializer,
+    RecommendedGroupSerializer, RecommendedSessionSerializer
 )
+from .cache import VersionedCacheMixin, bump_version
+from .conditional import ConditionalGetMixin
+from .idempotency import IdempotencyMixin
+from .metrics import registry
+from .pagination import KeysetPagination, KeysetPaginationMixin
+from .ranking import around, latest_badge, top
+from .search import KINDS, SearchResults, get_search_backend, query_tokens
 from .permissions import IsHostOrReadOnly, IsCreatorOrReadOnly, IsAdminUser
-from .utils import award_xp, XP_REWARDS
+from .signals import touch
+from .stats import bump_user_stats, get_user_stats
+from .utils import award_xp, bucket_start, XP_REWARDS
 
 
-class StudySessionViewSet(viewsets.ModelViewSet):
+def parse_datetime_param(params, name):
+    """Parse an ISO date or datetime query parameter into an aware datetime"""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: 'Expected an ISO 8601 date or datetime.'})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_int_param(params, name, default, maximum):
+    """Parse a positive integer query parameter no larger than maximum"""
+    value = params.get(name)
+    if not value:
+        return default
+    if not value.isdigit() or not 0 < int(value) <= maximum:
+        raise ValidationError({name: f'Expected an integer from 1 to {maximum}.'})
+    return int(value)
+
+
+MAX_BULK_IDS = 50
+MAX_NEIGHBOURS = 25
+
+
+def parse_bulk_ids(data):
+    """Validate the ids list of a bulk request, dropping duplicates but keeping order"""
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        raise ValidationError({'ids': 'Expected a non-empty list of ids.'})
+    if len(ids) > MAX_BULK_IDS:
+        raise ValidationError({'ids': f'At most {MAX_BULK_IDS} ids per request.'})
+    if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        raise ValidationError({'ids': 'Every id must be an integer.'})
+    return list(dict.fromkeys(ids))
+
+
+def insert_missing(model, user, key, ids, stamp):
+    """bulk_create a (user, key) row per id, skipping existing ones; returns the ids actually inserted
+
+    ignore_conflicts also skips rows a concurrent request inserted after they
+    were looked up, and leaves primary keys unset, so the rows are selected
+    again: one written here still carries the auto_now_add timestamp that
+    bulk_create stamped on its object.
+    """
+    objs = [model(user=user, **{key: pk}) for pk in ids]
+    model.objects.bulk_create(objs, ignore_conflicts=True)
+    stamps = {getattr(obj, key): getattr(obj, stamp) for obj in objs}
+    rows = model.objects.filter(user=user, **{f'{key}__in': ids}).values_list(key, stamp)
+    return {pk for pk, value in rows if stamps[pk] == value}
+
+
+def apply_filters(queryset, params, filters):
+    """Apply exact-match filters for each query parameter named in filters (param -> lookup)"""
+    for param, lookup in filters.items():
+        value = params.get(param)
+        if not value:
+            continue
+        if lookup.endswith('_id') and not value.isdigit():
+            raise ValidationError({param: 'Expected an integer id.'})
+        queryset = queryset.filter(**{lookup: value})
+    return queryset
+
+
+class StudySessionViewSet(IdempotencyMixin, ConditionalGetMixin, VersionedCacheMixin, KeysetPaginationMixin, viewsets.ModelViewSet):
     """ViewSet for StudySession CRUD and RSVP"""
-    queryset = StudySession.objects.all().select_related('host', 'group').prefetch_related('attendees')
+    cache_collections = ('sessions', 'groups')
+    cache_invalidates = ('sessions',)
+    idempotent_actions = ('rsvp', 'bulk_rsvp')
     permission_classes = [IsAuthenticatedOrReadOnly, IsHostOrReadOnly]
+    # subject and status refer to the session's group
+    filter_params = {
+        'course_code': 'course_code',
+        'subject': 'group__subject',
+        'host': 'host_id',
+        'group': 'group_id',
+        'status': 'group__status',
+    }
+    
+    def get_queryset(self):
+        if self.action in ('rsvp', 'cancel_rsvp'):
+            # Attendance actions only need to know the session exists
+            return self.get_conditional_queryset().only('id')
+        return self.get_conditional_queryset().with_attendance(self.request.user).select_related(
+            'host', 'group'
+        ).prefetch_related('attendees')
+    
+    def get_conditional_queryset(self):
+        queryset = apply_filters(StudySession.objects.all(), self.request.query_params, self.filter_params)
+        
+        # Optional ?from=&to= range on the indexed starts_at column
+        starts_from = parse_datetime_param(self.request.query_params, 'from')
+        starts_to = parse_datetime_param(self.request.query_params, 'to')
+        if starts_from:
+            queryset = queryset.filter(starts_at__gte=starts_from)
+        if starts_to:
+            queryset = queryset.filter(starts_at__lt=starts_to)
+        if starts_from or starts_to:
+            queryset = queryset.order_by('starts_at', 'id')
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'create':
             return StudySessionCreateSerializer
         return StudySessionSerializer
     
+    @transaction.atomic
     def perform_create(self, serializer):
         session = serializer.save(host=self.request.user)
         # Award XP for creating a session
-        award_xp(self.request.user, XP_REWARDS['create_session'])
+        award_xp(self.request.user, XP_REWARDS['create_session'], 'create_session')
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    @transaction.atomic
     def rsvp(self, request, pk=None):
         """RSVP to a session"""
         session = self.get_object()
         
-        # Check if already RSVP'd
-        if SessionRSVP.objects.filter(user=request.user, session=session).exists():
+        # Insert straight away and let the unique constraint catch duplicates,
+        # so double-clicks and retries cannot race an exists() check
+        try:
+            with transaction.atomic():
+                SessionRSVP.objects.create(user=request.user, session=session)
+        except IntegrityError:
             return Response(
                 {'detail': 'You have already RSVP\'d to this session'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create RSVP
-        SessionRSVP.objects.create(user=request.user, session=session)
-        
         # Award XP for RSVPing
-        award_xp(request.user, XP_REWARDS['rsvp_session'])
+        award_xp(request.user, XP_REWARDS['rsvp_session'], 'rsvp_session')
         
         return Response(
             {'detail': 'Successfully RSVP\'d to session', 'xp_earned': XP_REWARDS['rsvp_session']},
             status=status.HTTP_201_CREATED
         )
     
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    @transaction.atomic
+    def bulk_rsvp(self, request):
+        """RSVP to several sessions at once, reporting an outcome per session id"""
+        ids = parse_bulk_ids(request.data)
+        found = set(StudySession.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        attending = set(SessionRSVP.objects.filter(
+            user=request.user, session_id__in=found
+        ).values_list('session_id', flat=True))
+        missing = [pk for pk in ids if pk in found and pk not in attending]
+        inserted = insert_missing(SessionRSVP, request.user, 'session_id', missing, 'created_at') if missing else set()
+        created = [pk for pk in missing if pk in inserted]
+        attending.update(pk for pk in missing if pk not in inserted)
+        
+        if created:
+            # bulk_create skips post_save, so do the signal handlers' work once for the batch
+            bump_user_stats(request.user.pk, sessions_attended=len(created))
+            touch(StudySession, *created)
+            award_xp(request.user, XP_REWARDS['rsvp_session'] * len(created), 'rsvp_session')
+        
+        outcomes = {pk: 'created' for pk in created}
+        outcomes.update({pk: 'already_attending' for pk in attending})
+        return Response({
+            'results': [{'id': pk, 'status': outcomes.get(pk, 'not_found')} for pk in ids],
+            'xp_earned': XP_REWARDS['rsvp_session'] * len(created),
+        })
+    
     @action(detail=True, methods=['delete'], permission_classes=[IsAuthenticated])
+    @transaction.atomic
     def cancel_rsvp(self, request, pk=None):
         """Cancel RSVP to a session"""
         session = self.get_object()
@@ -70,29 +223,49 @@ class StudySessionViewSet(viewsets.ModelViewSet):
             )
 
 
-class StudyGroupViewSet(viewsets.ModelViewSet):
+class StudyGroupViewSet(IdempotencyMixin, ConditionalGetMixin, VersionedCacheMixin, KeysetPaginationMixin, viewsets.ModelViewSet):
     """ViewSet for StudyGroup CRUD and membership"""
+    cache_collections = ('groups', 'sessions')
+    cache_invalidates = ('groups',)
+    idempotent_actions = ('join', 'bulk_join')
     permission_classes = [IsAuthenticatedOrReadOnly, IsCreatorOrReadOnly]
+    # Groups store their course code in subject, so course_code is an alias for it
+    filter_params = {
+        'subject': 'subject',
+        'course_code': 'subject',
+        'host': 'creator_id',
+        'status': 'status',
+    }
     
     def get_queryset(self):
+        if self.action in ('join', 'leave'):
+            return self.get_conditional_queryset().only('id', 'status')
+        return self.get_conditional_queryset().with_membership(self.request.user).with_member_preview().select_related(
+            'creator'
+        )
+    
+    def get_conditional_queryset(self):
+        queryset = apply_filters(StudyGroup.objects.all(), self.request.query_params, self.filter_params)
         # Only show approved groups to non-staff users
         if self.request.user.is_staff:
-            return StudyGroup.objects.all().select_related('creator').prefetch_related('members')
-        return StudyGroup.objects.filter(status='approved').select_related('creator').prefetch_related('members')
+            return queryset
+        return queryset.filter(status='approved')
     
     def get_serializer_class(self):
         if self.action == 'create':
             return StudyGroupCreateSerializer
         return StudyGroupSerializer
     
+    @transaction.atomic
     def perform_create(self, serializer):
         group = serializer.save(creator=self.request.user, status='pending')
         # Automatically add creator as member
         GroupMembership.objects.create(user=self.request.user, group=group)
         # Award XP for creating a group
-        award_xp(self.request.user, XP_REWARDS['create_group'])
+        award_xp(self.request.user, XP_REWARDS['create_group'], 'create_group')
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    @transaction.atomic
     def join(self, request, pk=None):
         """Join a study group"""
         group = self.get_object()
@@ -104,25 +277,55 @@ class StudyGroupViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if already a member
-        if GroupMembership.objects.filter(user=request.user, group=group).exists():
+        # Insert and let the unique constraint reject existing members
+        try:
+            with transaction.atomic():
+                GroupMembership.objects.create(user=request.user, group=group)
+        except IntegrityError:
             return Response(
                 {'detail': 'You are already a member of this group'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Create membership
-        GroupMembership.objects.create(user=request.user, group=group)
-        
         # Award XP for joining a group
-        award_xp(request.user, XP_REWARDS['join_group'])
+        award_xp(request.user, XP_REWARDS['join_group'], 'join_group')
         
         return Response(
             {'detail': 'Successfully joined group', 'xp_earned': XP_REWARDS['join_group']},
             status=status.HTTP_201_CREATED
         )
     
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    @transaction.atomic
+    def bulk_join(self, request):
+        """Join several approved groups at once, reporting an outcome per group id"""
+        ids = parse_bulk_ids(request.data)
+        statuses = dict(StudyGroup.objects.filter(pk__in=ids).values_list('pk', 'status'))
+        approved = [pk for pk in ids if statuses.get(pk) == 'approved']
+        joined = set(GroupMembership.objects.filter(
+            user=request.user, group_id__in=approved
+        ).values_list('group_id', flat=True))
+        missing = [pk for pk in approved if pk not in joined]
+        inserted = insert_missing(GroupMembership, request.user, 'group_id', missing, 'joined_at') if missing else set()
+        created = [pk for pk in missing if pk in inserted]
+        joined.update(pk for pk in missing if pk not in inserted)
+        
+        if created:
+            bump_user_stats(request.user.pk, groups_joined=len(created))
+            touch(StudyGroup, *created)
+            award_xp(request.user, XP_REWARDS['join_group'] * len(created), 'join_group')
+        
+        # Like join, only staff can tell an unapproved group from a missing one
+        outcomes = {pk: 'not_approved' for pk in statuses} if request.user.is_staff else {}
+        outcomes.update({pk: 'created' for pk in created})
+        outcomes.update({pk: 'already_member' for pk in joined})
+        return Response({
+            'results': [{'id': pk, 'status': outcomes.get(pk, 'not_found')} for pk in ids],
+            'xp_earned': XP_REWARDS['join_group'] * len(created),
+        })
+    
     @action(detail=True, methods=['delete'], permission_classes=[IsAuthenticated])
+    @transaction.atomic
     def leave(self, request, pk=None):
         """Leave a study group"""
         group = self.get_object()
@@ -141,69 +344,177 @@ class StudyGroupViewSet(viewsets.ModelViewSet):
     def sessions(self, request, pk=None):
         """Get all sessions for this group"""
         group = self.get_object()
-        sessions = StudySession.objects.filter(group=group).select_related('host').prefetch_related('attendees')
+        sessions = StudySession.objects.filter(group=group).with_attendance(request.user).select_related(
+            'host', 'group'
+        ).prefetch_related('attendees')
         serializer = StudySessionSerializer(sessions, many=True, context={'request': request})
         return Response(serializer.data)
 
 
-class LeaderboardViewSet(viewsets.ViewSet):
+class LeaderboardViewSet(ConditionalGetMixin, VersionedCacheMixin, viewsets.ViewSet):
     """ViewSet for leaderboard rankings"""
+    cache_collections = ('leaderboard',)
+    
+    def get_conditional_validators(self):
+        # A windowed ranking also changes when its bucket rolls over
+        period = self.request.query_params.get('period', 'week')
+        bucket = bucket_start(period, timezone.localdate()) if period in dict(XPRollup.PERIOD_CHOICES) else None
+        if settings.CONDITIONAL_VERSION_VALIDATORS:
+            # XP awards, badges and user changes bump the leaderboard version
+            return None, bucket
+        # award_xp stamps users.updated_at, so this moves whenever any ranking can
+        row = User.objects.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        return row['last_modified'], f"{row['count']}:{bucket}"
+    
+    def get_ranking(self, period):
+        """(queryset, tie-break field) ranked for a period: XPRollup rows for day/week/month, users otherwise"""
+        if period in dict(XPRollup.PERIOD_CHOICES):
+            # Windowed leaderboard read straight off the (period, bucket_start, -xp) index
+            current_bucket = bucket_start(period, timezone.localdate())
+            return XPRollup.objects.filter(period=period, bucket_start=current_bucket).select_related('user'), 'user_id'
+        # All-time leaderboard, off the users (-xp, id) index
+        return User.objects.all(), 'id'
+    
+    def ranking_annotations(self, period):
+        if period in dict(XPRollup.PERIOD_CHOICES):
+            return {'latest_badge': latest_badge('user_id')}
+        return {'latest_badge': latest_badge(), 'period_xp': F('xp')}
+    
+    def get_leaders(self, period):
+        """Lazy queryset of the ranked top ten"""
+        queryset, tie_field = self.get_ranking(period)
+        return top(queryset, tie_field, 10, **self.ranking_annotations(period))
+    
+    def get_neighbours(self, user, period, size):
+        """The caller's ranked row and up to size rows either side, or [] with no XP in the period"""
+        queryset, tie_field = self.get_ranking(period)
+        entry = queryset.filter(**{tie_field: user.pk}).first()
+        if entry is None:
+            return []
+        return around(queryset, tie_field, entry, size, **self.ranking_annotations(period))
+    
+    def leaderboard_data(self, rows):
+        """Serialize fetched get_leaders()/get_neighbours() rows"""
+        users = []
+        for row in rows:
+            if isinstance(row, XPRollup):
+                row.user.period_xp = row.xp
+                row.user.rank = row.rank
+                row.user.latest_badge = row.latest_badge
+                row = row.user
+            users.append(row)
+        return LeaderboardSerializer(users, many=True).data
     
     def list(self, request):
-        """Get leaderboard data"""
+        """Get leaderboard data; ?around=me returns the caller's rank and neighbours instead"""
         period = request.query_params.get('period', 'week')
+        if request.query_params.get('around') != 'me':
+            return Response(self.leaderboard_data(self.get_leaders(period)))
         
-        if period == 'week':
-            # Get users who earned XP in the last week
-            week_ago = timezone.now() - timedelta(days=7)
-            # For simplicity, just show top users by XP (would need activity tracking for true weekly)
-            users = User.objects.all().order_by('-xp')[:10]
-        else:
-            # All-time leaderboard
-            users = User.objects.all().order_by('-xp')[:10]
+        if not request.user.is_authenticated:
+            raise NotAuthenticated()
+        size = parse_int_param(request.query_params, 'size', default=5, maximum=MAX_NEIGHBOURS)
+        data = self.leaderboard_data(self.get_neighbours(request.user, period, size))
+        rank = next((row['rank'] for row in data if row['id'] == request.user.pk), None)
+        return Response({'rank': rank, 'results': data})
+
+
+class SearchViewSet(VersionedCacheMixin, viewsets.ViewSet):
+    """ViewSet for ranked full-text search over sessions and approved groups"""
+    cache_collections = ('sessions', 'groups')
+    
+    def list(self, request):
+        """Search titles, course codes, subjects and descriptions"""
+        tokens = query_tokens(request.query_params.get('q', ''))
+        kind = request.query_params.get('type')
+        if kind and kind not in KINDS:
+            raise ValidationError({'type': f"Expected one of: {', '.join(KINDS)}."})
         
-        serializer = LeaderboardSerializer(users, many=True)
+        paginator = PageNumberPagination()
+        hits = paginator.paginate_queryset(SearchResults(get_search_backend(), tokens, kind), request, view=self)
         
-        # Add rank to each user
-        data = serializer.data
-        for idx, user_data in enumerate(data, 1):
-            user_data['rank'] = idx
+        # Hydrate each page with one query per kind, keeping the ranked order
+        ids = {name: [object_id for hit_kind, object_id, _ in hits if hit_kind == name] for name in KINDS}
+        sessions = StudySession.objects.filter(pk__in=ids['session']).with_attendance(request.user).select_related(
+            'host', 'group'
+        ).prefetch_related('attendees') if ids['session'] else []
+        groups = StudyGroup.objects.filter(
+            pk__in=ids['group'], status='approved'
+        ).with_membership(request.user).with_member_preview().select_related('creator') if ids['group'] else []
+        context = {'request': request}
+        serialized = {
+            'session': {item['id']: item for item in StudySessionSerializer(sessions, many=True, context=context).data},
+            'group': {item['id']: item for item in StudyGroupSerializer(groups, many=True, context=context).data},
+        }
         
-        return Response(data)
+        results = []
+        for hit_kind, object_id, score in hits:
+            # The index can briefly lag a delete; skip rows whose object is gone
+            if object_id in serialized[hit_kind]:
+                results.append({
+                    'type': hit_kind,
+                    'id': object_id,
+                    'score': round(score, 4),
+                    'object': serialized[hit_kind][object_id],
+                })
+        return paginator.get_paginated_response(results)
+
+
+class RecommendationViewSet(viewsets.ViewSet):
+    """ViewSet for the caller's recommended groups and sessions, precomputed by build_recommendations"""
+    permission_classes = [IsAuthenticated]
+    
+    def list(self, request):
+        """Recommended groups and sessions, best first, in one indexed read"""
+        groups, sessions = [], []
+        for row in Recommendation.objects.for_user(request.user):
+            item = row.group or row.session
+            item.score = round(row.score, 4)
+            (groups if row.group_id else sessions).append(item)
+        return Response({
+            'groups': RecommendedGroupSerializer(groups, many=True).data,
+            'sessions': RecommendedSessionSerializer(sessions, many=True).data,
+        })
 
 
 class DashboardViewSet(viewsets.ViewSet):
     """ViewSet for dashboard data"""
     permission_classes = [IsAuthenticated]
     
-    def list(self, request):
-        """Get dashboard data for current user"""
-        user = request.user
-        
-        # Get upcoming sessions user is attending
-        upcoming_sessions = StudySession.objects.filter(
+    def get_upcoming_sessions(self, user):
+        """Upcoming sessions the user is attending, soonest first; unscheduled ones last"""
+        return StudySession.objects.filter(
+            Q(starts_at__gte=timezone.now()) | Q(starts_at__isnull=True),
             attendees=user
-        ).select_related('host', 'group')[:3]
-        
+        ).with_attendance(user).select_related('host', 'group').prefetch_related('attendees').order_by(
+            F('starts_at').asc(nulls_last=True), '-created_at'
+        )[:3]
+    
+    def dashboard_data(self, user, upcoming_sessions, user_stats):
         sessions_serializer = StudySessionSerializer(
             upcoming_sessions, 
             many=True, 
-            context={'request': request}
+            context={'request': self.request}
         )
         
-        # Get user stats
+        # Stats come from the denormalized counters
         stats = {
-            'sessions_attended': SessionRSVP.objects.filter(user=user).count(),
-            'groups_joined': GroupMembership.objects.filter(user=user).count(),
-            'sessions_hosted': StudySession.objects.filter(host=user).count(),
+            'sessions_attended': user_stats.sessions_attended,
+            'groups_joined': user_stats.groups_joined,
+            'sessions_hosted': user_stats.sessions_hosted,
             'xp': user.xp,
             'level': user.level,
         }
         
-        return Response({
+        return {
             'upcoming_sessions': sessions_serializer.data,
             'stats': stats,
-        })
+        }
+    
+    def list(self, request):
+        """Get dashboard data for current user"""
+        user = request.user
+        return Response(self.dashboard_data(user, self.get_upcoming_sessions(user), get_user_stats(user)))
 
 
 class AdminViewSet(viewsets.ViewSet):
@@ -211,29 +522,40 @@ class AdminViewSet(viewsets.ViewSet):
     permission_classes = [IsAdminUser]
     
     def list(self, request):
-        """Get all group requests"""
-        groups = StudyGroup.objects.all().select_related('creator').annotate(
-            members_count=Count('members')
-        )
+        """Get group requests, one keyset-paginated page per status, with moderation stats"""
+        groups = StudyGroup.objects.with_membership().with_member_preview().select_related('creator')
+        statuses = [value for value, _ in StudyGroup.STATUS_CHOICES]
         
-        pending = groups.filter(status='pending')
-        approved = groups.filter(status='approved')
-        rejected = groups.filter(status='rejected')
+        # ?status=<bucket>&cursor=... pages through a single bucket
+        requested_status = request.query_params.get('status')
+        if requested_status:
+            if requested_status not in statuses:
+                raise ValidationError({'status': f'Expected one of: {", ".join(statuses)}.'})
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(groups.filter(status=requested_status), request, view=self)
+            return paginator.get_paginated_response(StudyGroupSerializer(page, many=True).data)
         
-        data = {
-            'pending': StudyGroupSerializer(pending, many=True).data,
-            'approved': StudyGroupSerializer(approved, many=True).data,
-            'rejected': StudyGroupSerializer(rejected, many=True).data,
-            'stats': {
-                'total_groups': groups.count(),
-                'approved_groups': approved.count(),
-                'rejected_groups': rejected.count(),
-                'total_sessions': StudySession.objects.count(),
-                'active_sessions': StudySession.objects.filter(
-                    attendees__isnull=False
-                ).distinct().count(),
-            }
-        }
+        data = {'next': {}}
+        for group_status in statuses:
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(groups.filter(status=group_status), request, view=self)
+            data[group_status] = StudyGroupSerializer(page, many=True).data
+            next_link = paginator.get_next_link()
+            data['next'][group_status] = next_link and replace_query_param(next_link, 'status', group_status)
+        
+        # One conditional aggregate per table instead of a COUNT per bucket
+        group_stats = StudyGroup.objects.aggregate(
+            total_groups=Count('id'),
+            pending_groups=Count('id', filter=Q(status='pending')),
+            approved_groups=Count('id', filter=Q(status='approved')),
+            rejected_groups=Count('id', filter=Q(status='rejected')),
+        )
+        # EXISTS probes the session_id index instead of DISTINCT over a join with every RSVP
+        session_stats = StudySession.objects.aggregate(
+            total_sessions=Count('id'),
+            active_sessions=Count('id', filter=Exists(SessionRSVP.objects.filter(session=OuterRef('pk')))),
+        )
+        data['stats'] = {**group_stats, **session_stats}
         
         return Response(data)
     
@@ -244,6 +566,7 @@ class AdminViewSet(viewsets.ViewSet):
             group = StudyGroup.objects.get(pk=pk)
             group.status = 'approved'
             group.save()
+            bump_version('groups')
             return Response({'detail': 'Group approved'}, status=status.HTTP_200_OK)
         except StudyGroup.DoesNotExist:
             return Response({'detail': 'Group not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -255,6 +578,15 @@ class AdminViewSet(viewsets.ViewSet):
             group = StudyGroup.objects.get(pk=pk)
             group.status = 'rejected'
             group.save()
+            bump_version('groups')
             return Response({'detail': 'Group rejected'}, status=status.HTTP_200_OK)
         except StudyGroup.DoesNotExist:
             return Response({'detail': 'Group not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+class MetricsView(APIView):
+    """Per-route latency, SQL, serializer and query-count histograms in Prometheus format"""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from api.cache import cache_user, get_cached_user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves users through the versioned user cache
+
+    Saves to a user, award_xp and deletions bump the user's version, so a
+    cached row is never served after it changed. That only holds when every
+    worker shares the cache, so AUTH_USER_CACHE is off for per-process
+    backends. Writes always load the user from the database, so a request
+    that saves request.user never writes back cached columns.
+
+    Entries hold the user's columns without the password hash, plus the
+    fingerprint of it that revocable tokens carry. The password comes back
+    deferred, so a save() of a cached user leaves it untouched.
+    """
+    # Set per request by authenticate(); get_user() called directly never uses the cache
+    use_cache = False
+
+    def authenticate(self, request):
+        self.use_cache = settings.AUTH_USER_CACHE and request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if not self.use_cache:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        entry, version = get_cached_user(user_id)
+        if entry is None:
+            user = super().get_user(validated_token)
+            fields = {
+                field.attname: getattr(user, field.attname)
+                for field in user._meta.concrete_fields if field.attname != 'password'
+            }
+            cache_user(user_id, version, (fields, get_md5_hash_password(user.password)))
+            return user
+
+        fields, password_hash = entry
+        user = self.user_model.from_db('default', list(fields), list(fields.values()))
+        # The same checks JWTAuthentication runs on a freshly loaded user
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
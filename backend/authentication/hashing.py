@@ -0,0 +1,49 @@
+"""Bounded thread pool for password hashing in async views
+
+PBKDF2 is deliberately slow and hashlib releases the GIL while it runs, so
+hashing on a small pool of threads keeps the event loop free without letting
+a burst of logins start unbounded work. Once ``PASSWORD_HASHER_QUEUE`` jobs
+are running or waiting, new ones are refused with HasherBusy so the view can
+answer 503 straight away instead of queueing requests it cannot serve.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_pool = None
+_slots = None
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool already has as much work as it may queue"""
+
+
+def configure_pool(threads=None, queue=None):
+    """(Re)create the pool; the benchmark uses this to compare thread counts"""
+    global _pool, _slots
+    threads = threads or settings.PASSWORD_HASHER_THREADS
+    queue = max(queue or settings.PASSWORD_HASHER_QUEUE, threads)
+    with _lock:
+        old = _pool
+        _pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='password-hasher')
+        # A thread-safe counter rather than an asyncio.Semaphore, which is tied to one event loop
+        _slots = threading.BoundedSemaphore(queue)
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+async def run_hasher(func, *args):
+    """Run a hashing function on the pool, raising HasherBusy when the queue is full"""
+    if _pool is None:
+        configure_pool()
+    pool, slots = _pool, _slots
+    if not slots.acquire(blocking=False):
+        raise HasherBusy()
+    future = pool.submit(func, *args)
+    # Release on completion, not when the awaiting request goes away, so the bound
+    # always counts hashing work that is really running or queued
+    future.add_done_callback(lambda _: slots.release())
+    return await asyncio.wrap_future(future)
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+from api.models import User
+from authentication.hashing import configure_pool
+
+BENCH_USERNAME = 'benchmark-login'
+BENCH_PASSWORD = 'benchmark-password'
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Measure async login throughput for several password-hashing thread counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', default='1,2,4,8', help='Comma-separated hashing thread counts')
+        parser.add_argument('--requests', type=int, default=64, help='Logins per thread count')
+        parser.add_argument('--concurrency', type=int, default=32, help='Logins in flight at once')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=BENCH_USERNAME).first()
+        if user is None:
+            user = User.objects.create_user(username=BENCH_USERNAME, password=BENCH_PASSWORD)
+        try:
+            self.stdout.write(f"{'threads':>8} {'logins/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'503s':>6}")
+            for threads in [int(value) for value in options['threads'].split(',')]:
+                # Queue everything so the run measures hashing throughput, not back-pressure
+                configure_pool(threads=threads, queue=options['requests'])
+                # The in-process client always sends Host: testserver
+                with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                    elapsed, latencies, rejected = asyncio.run(
+                        self.run_logins(options['requests'], options['concurrency'])
+                    )
+                self.stdout.write(
+                    f'{threads:>8} {len(latencies) / elapsed:>10.1f} '
+                    f'{percentile(latencies, 0.5) * 1000:>8.0f} {percentile(latencies, 0.95) * 1000:>8.0f} '
+                    f'{rejected:>6}'
+                )
+        finally:
+            configure_pool()
+            user.delete()
+
+    async def run_logins(self, count, concurrency):
+        # Requests go through the ASGI handler in-process, so no server or network is involved
+        client = AsyncClient()
+        gate = asyncio.Semaphore(concurrency)
+        latencies = []
+        rejected = 0
+
+        async def login():
+            nonlocal rejected
+            async with gate:
+                started = time.perf_counter()
+                response = await client.post(
+                    '/api/auth/login/', {'username': BENCH_USERNAME, 'password': BENCH_PASSWORD},
+                    content_type='application/json'
+                )
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    rejected += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(count)))
+        return time.perf_counter() - started, latencies, rejected
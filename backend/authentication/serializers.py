@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 from api.models import User
 
@@ -23,14 +24,17 @@ class RegisterSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
+        """Create the user with one INSERT; pass password_hash to skip hashing here"""
         validated_data.pop('password2')
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
+        password = validated_data.pop('password')
+        password_hash = validated_data.pop('password_hash', None)
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data['email']),
             first_name=validated_data['first_name'],
-            last_name=validated_data['last_name']
+            last_name=validated_data['last_name'],
+            password=password_hash or make_password(password),
         )
-        user.set_password(validated_data['password'])
         user.save()
         return user
 
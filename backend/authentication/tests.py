@@ -1,3 +1,213 @@
-from django.test import TestCase
+import asyncio
+from threading import Event
 
-# Create your tests here.
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.cache import get_cached_user
+from api.models import User, StudyGroup, GroupMembership, Badge
+from api.rank_index import rank_index
+from api.utils import award_xp
+from .hashing import configure_pool, run_hasher
+
+
+@override_settings(AUTH_USER_CACHE=True)
+class CachedJWTAuthenticationTests(APITestCase):
+    """Authenticated requests resolve the user from the cache until it changes"""
+
+    def setUp(self):
+        cache.clear()
+        rank_index.reconcile()
+        self.user = User.objects.create_user(username='cached', password='password123')
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def get_me(self, queries):
+        # A cache miss costs the user lookup plus the badges and groups of the profile
+        with self.assertNumQueries(queries):
+            response = self.client.get('/api/auth/me/')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_second_request_is_served_from_cache(self):
+        cold = self.get_me(3)
+        warm = self.get_me(0)
+        self.assertEqual(cold.data, warm.data)
+
+    def test_award_xp_invalidates(self):
+        self.get_me(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            award_xp(self.user, 50, 'create_session')
+        self.assertEqual(self.get_me(3).data['xp'], 50)
+
+    def test_profile_update_invalidates(self):
+        self.get_me(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/auth/me/', {'first_name': 'Ada'})
+        self.assertEqual(self.get_me(3).data['first_name'], 'Ada')
+
+    def test_deactivated_user_is_rejected(self):
+        self.get_me(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.get(pk=self.user.pk)
+            user.is_active = False
+            user.save()
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 401)
+
+    def test_cache_never_holds_password_hash(self):
+        self.get_me(3)
+        entry, _ = get_cached_user(self.user.pk)
+        self.assertNotIn(self.user.password, str(entry))
+
+    def test_update_never_writes_back_cached_columns(self):
+        self.get_me(3)
+        # Another worker's award, whose version bump never reached this cache
+        award_xp(self.user, 50, 'create_session')
+        response = self.client.patch('/api/auth/me/', {'first_name': 'Ada'})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.first_name, self.user.xp), ('Ada', 50))
+        self.assertTrue(self.user.check_password('password123'))
+
+    @override_settings(AUTH_USER_CACHE=False)
+    def test_disabled_cache_loads_every_request(self):
+        self.get_me(3)
+        # The user lookup only; the profile has its own cache
+        self.get_me(1)
+
+
+@override_settings(AUTH_USER_CACHE=True)
+class CurrentUserProfileTests(APITestCase):
+    """The profile is one query per relation and cached until the user's data changes"""
+
+    def setUp(self):
+        cache.clear()
+        rank_index.reconcile()
+        self.user = User.objects.create_user(username='member', password='password123')
+        self.other = User.objects.create_user(username='other', password='password123')
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        for idx in range(5):
+            group = StudyGroup.objects.create(name=f'Group {idx}', subject='CS101', description='x',
+                                              creator=self.other, status='approved')
+            GroupMembership.objects.create(user=self.user, group=group)
+            GroupMembership.objects.create(user=self.other, group=group)
+        self.pending = StudyGroup.objects.create(name='Pending', subject='CS101', description='x',
+                                                 creator=self.user, status='pending')
+        GroupMembership.objects.create(user=self.user, group=self.pending)
+
+    def test_groups_annotated_in_one_query(self):
+        # The user lookup, the badges and the groups with their member counts
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/auth/me/')
+        groups = response.data['groups']
+        self.assertEqual(len(groups), 5)
+        self.assertEqual({group['members_count'] for group in groups}, {2})
+
+    def test_own_changes_invalidate(self):
+        self.client.get('/api/auth/me/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Badge.objects.create(name='Rising Star', icon='Zap', color='c', bg_color='b', user=self.user)
+        self.assertEqual(len(self.client.get('/api/auth/me/').data['badges']), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            GroupMembership.objects.filter(user=self.user).first().delete()
+        self.assertEqual(len(self.client.get('/api/auth/me/').data['groups']), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending.status = 'approved'
+            self.pending.save()
+        self.assertEqual(len(self.client.get('/api/auth/me/').data['groups']), 5)
+
+    def test_other_users_changes_keep_cache(self):
+        self.client.get('/api/auth/me/')
+        with self.captureOnCommitCallbacks(execute=True):
+            award_xp(self.other, 50, 'create_session')
+            Badge.objects.create(name='Rising Star', icon='Zap', color='c', bg_color='b', user=self.other)
+        with self.assertNumQueries(0):
+            self.client.get('/api/auth/me/')
+
+    def test_standing_is_not_cached_with_profile(self):
+        rank_index.reconcile()
+        response = self.client.get('/api/auth/me/')
+        self.assertEqual((response.data['rank'], response.data['percentile']), (1, 50.0))
+        with self.captureOnCommitCallbacks(execute=True):
+            award_xp(self.other, 50, 'create_session')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/me/')
+        self.assertEqual((response.data['rank'], response.data['percentile']), (2, 100.0))
+
+
+class AsyncAuthViewTests(APITransactionTestCase):
+    """Login and register hash passwords off the event loop and keep their responses"""
+    # Login authenticates on a hasher pool thread, which only sees committed rows
+
+    def setUp(self):
+        cache.clear()
+        rank_index.reconcile()
+        self.user = User.objects.create_user(username='student', password='password123')
+
+    def test_login(self):
+        response = self.client.post('/api/auth/login/', {'username': 'student', 'password': 'password123'},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['user']['username'], 'student')
+        self.assertEqual(body['user']['xp'], 0)
+        self.assertIn('access', body['tokens'])
+        # Token logins write nothing
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+
+    def test_login_rejects_bad_credentials(self):
+        failures = []
+        user_login_failed.connect(lambda credentials, **kwargs: failures.append(credentials['username']),
+                                  weak=False, dispatch_uid='test_login_failed')
+        self.addCleanup(user_login_failed.disconnect, dispatch_uid='test_login_failed')
+        for username, password in [('student', 'wrong'), ('nobody', 'password123')]:
+            response = self.client.post('/api/auth/login/', {'username': username, 'password': password},
+                                        format='json')
+            self.assertEqual(response.status_code, 401)
+        self.assertEqual(failures, ['student', 'nobody'])
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post('/api/auth/login/', {'username': 'student', 'password': 'password123'},
+                                    format='json')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.post('/api/auth/login/', {'username': 'student'}, format='json').status_code,
+                         400)
+
+    def test_register(self):
+        payload = {
+            'username': 'newbie', 'password': 'Tr1cky-Passw0rd', 'password2': 'Tr1cky-Passw0rd',
+            'email': 'newbie@example.com', 'first_name': 'New', 'last_name': 'Bie',
+        }
+        response = self.client.post('/api/auth/register/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(username='newbie').check_password('Tr1cky-Passw0rd'))
+        # Username uniqueness is still validated
+        response = self.client.post('/api/auth/register/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('username', response.json())
+
+    async def test_full_hasher_queue_answers_503(self):
+        release = Event()
+        configure_pool(threads=1, queue=1)
+        try:
+            blocker = asyncio.ensure_future(run_hasher(release.wait))
+            await asyncio.sleep(0)
+            try:
+                response = await self.async_client.post(
+                    '/api/auth/login/', {'username': 'student', 'password': 'password123'},
+                    content_type='application/json'
+                )
+            finally:
+                release.set()
+                await blocker
+        finally:
+            configure_pool()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
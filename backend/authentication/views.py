@@ -1,82 +1,144 @@
+import json
+
+from asgiref.sync import sync_to_async
 from rest_framework import generics, status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.db import close_old_connections
+from django.db.models import prefetch_related_objects
+from django.http import JsonResponse
+from django.views import View
+from api.cache import bump_version, cache_profile, get_cached_profile
 from api.models import User
+from api.rank_index import rank_index
 from api.serializers import UserProfileSerializer
+from .hashing import HasherBusy, run_hasher
 from .serializers import RegisterSerializer, LoginSerializer
 
 
-class RegisterView(generics.CreateAPIView):
+def user_payload(user, **extra):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        **extra,
+        'is_staff': user.is_staff,
+    }
+
+
+def token_payload(user):
+    refresh = RefreshToken.for_user(user)
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    }
+
+
+def hasher_busy():
+    response = JsonResponse(
+        {'detail': 'Too many sign-ins in progress, please retry shortly'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = '1'
+    return response
+
+
+def authenticate_user(request, username, password):
+    """django.contrib.auth.authenticate for the hasher pool
+
+    Pool threads are not request threads, so nothing else closes the
+    database connection the backends open in them.
+    """
+    try:
+        return authenticate(request, username=username, password=password)
+    finally:
+        close_old_connections()
+
+
+class AsyncJSONView(View):
+    """Async JSON endpoint for the ASGI application
+
+    DRF's APIView is sync-only, so these views parse and render JSON themselves.
+    Like APIView they are CSRF exempt, since they do not use cookie sessions.
+    """
+    http_method_names = ['post', 'options']
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    def parse_body(self, request):
+        if request.content_type != 'application/json':
+            return request.POST.dict()
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+
+class RegisterView(AsyncJSONView):
     """User registration endpoint"""
-    queryset = User.objects.all()
-    permission_classes = (AllowAny,)
-    serializer_class = RegisterSerializer
-
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        user = serializer.save()
-        
-        # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
-        
-        return Response({
-            'user': {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'is_staff': user.is_staff,
-            },
-            'tokens': {
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
-            }
+
+    async def post(self, request):
+        data = self.parse_body(request)
+        if data is None:
+            return JsonResponse({'detail': 'JSON parse error'}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = RegisterSerializer(data=data)
+        # Validation checks the username is unique, so it runs where the ORM may block
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            password_hash = await run_hasher(make_password, serializer.validated_data['password'])
+        except HasherBusy:
+            return hasher_busy()
+        user = await sync_to_async(serializer.save)(password_hash=password_hash)
+
+        return JsonResponse({
+            'user': user_payload(user),
+            'tokens': token_payload(user),
         }, status=status.HTTP_201_CREATED)
 
 
-class LoginView(APIView):
+class LoginView(AsyncJSONView):
     """User login endpoint"""
-    permission_classes = (AllowAny,)
-    serializer_class = LoginSerializer
-
-    def post(self, request):
-        serializer = LoginSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        
-        username = serializer.validated_data['username']
-        password = serializer.validated_data['password']
-        
-        user = authenticate(username=username, password=password)
-        
+
+    async def post(self, request):
+        data = self.parse_body(request)
+        if data is None:
+            return JsonResponse({'detail': 'JSON parse error'}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = LoginSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # The backends, user_login_failed and password upgrades all run, with hashing on the pool
+            user = await run_hasher(
+                authenticate_user, request,
+                serializer.validated_data['username'], serializer.validated_data['password']
+            )
+        except HasherBusy:
+            return hasher_busy()
+
         if user is None:
-            return Response(
+            return JsonResponse(
                 {'detail': 'Invalid credentials'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
-        
-        # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
-        
-        return Response({
-            'user': {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'xp': user.xp,
-                'level': user.level,
-                'is_staff': user.is_staff,
-            },
-            'tokens': {
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
-            }
+
+        return JsonResponse({
+            'user': user_payload(user, xp=user.xp, level=user.level),
+            'tokens': token_payload(user),
         })
 
 
@@ -86,4 +148,20 @@ class CurrentUserView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
 
     def get_object(self):
-        return self.request.user
+        user = self.request.user
+        prefetch_related_objects([user], *UserProfileSerializer.prefetches())
+        return user
+    
+    def retrieve(self, request, *args, **kwargs):
+        # Loaded on every page, so served from a per-user cache that writes invalidate
+        data, version = get_cached_profile(request.user.pk)
+        if data is None:
+            data = self.get_serializer(self.get_object()).data
+            cache_profile(request.user.pk, version, data)
+        # Standing moves whenever anyone earns XP, so it is never cached with the profile
+        return Response({**data, **rank_index.standing(data['xp'])})
+    
+    def perform_update(self, serializer):
+        serializer.save()
+        # Names and avatars appear in cached session, group and leaderboard responses
+        bump_version('sessions', 'groups', 'leaderboard')
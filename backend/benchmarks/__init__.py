@@ -0,0 +1,11 @@
+"""Endpoint latency benchmarks over synthetic datasets
+
+Run from the backend directory::
+
+    python -m benchmarks --size 1k --size 10k
+    python -m benchmarks --size 1k --save-baseline
+
+Each size is built in a throwaway test database, every API route is driven
+through the Django test client, and p50/p95/p99 latency plus query counts are
+compared with benchmarks/baseline.json.
+"""
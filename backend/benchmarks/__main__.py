@@ -0,0 +1,75 @@
+"""python -m benchmarks [--size 1k] [--iterations 20] [--save-baseline] [--fail-on-regression]"""
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+import django
+
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Endpoint latency benchmarks')
+    parser.add_argument('--size', action='append', choices=['1k', '10k', '100k'],
+                        help='Dataset size; repeat for several (default: 1k)')
+    parser.add_argument('--iterations', type=int, default=20, help='Requests per endpoint')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=str(BASELINE))
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 slowdown before flagging')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on regressions')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'studysphere.settings')
+    django.setup()
+    # The 404/400 warnings from deliberate error paths would drown the report
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from .datasets import SIZES, build_dataset
+    from .runner import compare, format_report, load_baseline, run_benchmarks, save_baseline
+
+    baseline = load_baseline(args.baseline)
+    regressions = []
+    if connection.vendor == 'sqlite':
+        # Time queries against a database file, as deployments run, not the test runner's in-memory default
+        connection.settings_dict['TEST']['NAME'] = settings.BASE_DIR / 'test_db.sqlite3'
+    setup_test_environment()
+    try:
+        for size in args.size or ['1k']:
+            # A fresh throwaway database per size, never the development one
+            test_db = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+            try:
+                print(f'Building the {size} dataset...', file=sys.stderr)
+                ctx = build_dataset(SIZES[size], seed=args.seed)
+                results = run_benchmarks(ctx, iterations=args.iterations)
+            finally:
+                connection.creation.destroy_test_db(test_db, verbosity=0)
+
+            print(format_report(size, results, baseline.get(size)))
+            for name, reason in compare(results, baseline.get(size, {}), args.tolerance):
+                regressions.append((size, name, reason))
+            if args.save_baseline:
+                baseline[size] = {name: row for name, row in results.items() if row is not None}
+    finally:
+        teardown_test_environment()
+
+    if args.save_baseline:
+        save_baseline(args.baseline, baseline)
+        print(f'Baseline written to {args.baseline}')
+    if regressions:
+        print('\nRegressions against the baseline:')
+        for size, name, reason in regressions:
+            print(f'  [{size}] {name}: {reason}')
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
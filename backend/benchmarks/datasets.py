@@ -0,0 +1,115 @@
+"""Synthetic datasets for the benchmarks, generated with bulk_create and a fixed seed"""
+import io
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.utils import timezone
+
+from api import recommendations
+from api.models import User, StudyGroup, StudySession, GroupMembership, SessionRSVP, Badge
+from api.rank_index import rank_index
+from api.utils import calculate_level
+
+SIZES = {
+    '1k': 1_000,
+    '10k': 10_000,
+    '100k': 100_000,
+}
+
+PASSWORD = 'benchmark-password'
+BATCH_SIZE = 5_000
+
+# Per-user ratios, roughly what the demo data looks like
+GROUPS_PER_USER = 0.1
+SESSIONS_PER_USER = 0.5
+MEMBERSHIPS_PER_USER = 2
+RSVPS_PER_USER = 5
+
+COURSES = ['22CS3AEFWD', '23MA3BSSDM', '23CS3PCOOJ', '23CS3PCDST', '23CS6PCMAL']
+TOPICS = ['algorithms', 'calculus', 'databases', 'networks', 'statistics', 'compilers', 'graphs', 'probability']
+
+
+def chunked_create(model, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def build_dataset(users, seed=0):
+    """Populate the current database and return the ids the endpoints need"""
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+    now = timezone.now()
+
+    def make_user(idx):
+        xp = rng.randint(0, 5000)
+        return User(
+            username=f'user{idx}', email=f'user{idx}@example.com', password=password,
+            first_name='User', last_name=str(idx), xp=xp, level=calculate_level(xp),
+        )
+    chunked_create(User, (make_user(idx) for idx in range(users)))
+    staff = User.objects.create_user(username='bench-staff', password=PASSWORD, is_staff=True)
+    user_ids = list(User.objects.filter(is_staff=False).order_by('pk').values_list('pk', flat=True))
+
+    def make_group(idx):
+        status = rng.choices(['approved', 'pending', 'rejected'], weights=[80, 15, 5])[0]
+        return StudyGroup(
+            name=f'{rng.choice(TOPICS).title()} circle {idx}', subject=rng.choice(COURSES),
+            description=f'Weekly {rng.choice(TOPICS)} practice', creator_id=rng.choice(user_ids), status=status,
+        )
+    chunked_create(StudyGroup, (make_group(idx) for idx in range(max(1, int(users * GROUPS_PER_USER)))))
+    approved = list(StudyGroup.objects.filter(status='approved').values_list('pk', flat=True))
+    pending = list(StudyGroup.objects.filter(status='pending').values_list('pk', flat=True))
+
+    def make_session(idx):
+        starts_at = now + timedelta(hours=rng.randint(-24 * 30, 24 * 30))
+        return StudySession(
+            title=f'{rng.choice(TOPICS).title()} review {idx}', course_code=rng.choice(COURSES),
+            description=f'Going through {rng.choice(TOPICS)} problems', location='Library',
+            date=starts_at.strftime('%B %d'), time=f"{starts_at.strftime('%I:%M %p')} - late",
+            starts_at=starts_at, ends_at=starts_at + timedelta(hours=2),
+            host_id=rng.choice(user_ids), group_id=rng.choice(approved) if approved and rng.random() < 0.5 else None,
+        )
+    chunked_create(StudySession, (make_session(idx) for idx in range(max(1, int(users * SESSIONS_PER_USER)))))
+    session_ids = list(StudySession.objects.values_list('pk', flat=True))
+
+    chunked_create(GroupMembership, (
+        GroupMembership(user_id=user_id, group_id=group_id)
+        for user_id in user_ids
+        for group_id in rng.sample(approved, min(MEMBERSHIPS_PER_USER, len(approved)))
+    ))
+    chunked_create(SessionRSVP, (
+        SessionRSVP(user_id=user_id, session_id=session_id)
+        for user_id in user_ids
+        for session_id in rng.sample(session_ids, min(RSVPS_PER_USER, len(session_ids)))
+    ))
+    chunked_create(Badge, (
+        Badge(name='Rising Star', icon='Zap', color='text-purple-500', bg_color='bg-purple-500/20', user_id=user_id)
+        for user_id in user_ids if rng.random() < 0.2
+    ))
+    # bulk_create skips the signals that maintain the search index
+    call_command('rebuild_search_index', stdout=io.StringIO())
+    # The rank index outlives each size's test database
+    rank_index.reconcile()
+    recommendations.build()
+
+    member = User.objects.get(pk=user_ids[0])
+    attending = set(SessionRSVP.objects.filter(user=member).values_list('session_id', flat=True))
+    joined = set(GroupMembership.objects.filter(user=member).values_list('group_id', flat=True))
+    return {
+        'member': member,
+        'staff': staff,
+        'session_id': session_ids[len(session_ids) // 2],
+        'group_id': approved[len(approved) // 2] if approved else None,
+        'free_session_ids': [pk for pk in session_ids[:500] if pk not in attending],
+        'free_group_ids': [pk for pk in approved[:500] if pk not in joined],
+        'pending_group_ids': pending,
+        'today': now.date().isoformat(),
+    }
@@ -0,0 +1,118 @@
+"""Every route in api/urls.py and authentication/urls.py, as requests the runner can repeat
+
+Paths and bodies are callables of (ctx, i), where ctx is what build_dataset()
+returned plus whatever earlier endpoints collected (the ids
+of objects they created) and i is the iteration, so
+writes never hit the same row twice: iteration i of cancel_rsvp undoes
+iteration i of rsvp, delete removes what create made, and so on. Approve and
+reject flip the same pending groups back and forth.
+"""
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from api.models import StudyGroup, StudySession
+
+from .datasets import COURSES, PASSWORD
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    path: Callable
+    data: Optional[Callable] = None
+    user: Optional[str] = 'member'  # ctx key of the caller, None for anonymous
+    collect: Optional[Callable] = None  # called with (ctx, response) after each request
+
+    def request(self, ctx, i):
+        return self.path(ctx, i), self.data(ctx, i) if self.data else None
+
+
+def collect_session(ctx, response):
+    # The create serializers do not return the new id
+    ctx.setdefault('created_sessions', []).append(
+        StudySession.objects.filter(host=ctx['member']).latest('pk').pk
+    )
+
+
+def collect_group(ctx, response):
+    group = StudyGroup.objects.filter(creator=ctx['member']).latest('pk')
+    # Pending groups are hidden from their creator, so approve it for the delete endpoint
+    StudyGroup.objects.filter(pk=group.pk).update(status='approved')
+    ctx.setdefault('created_groups', []).append(group.pk)
+
+
+def session_payload(ctx, i):
+    return {
+        'title': f'Benchmark review {i}', 'course_code': COURSES[i % len(COURSES)],
+        'description': 'Benchmark session', 'date': 'October 22', 'time': '8:00 AM - 10:00 AM',
+        'location': 'Library',
+    }
+
+
+def register_payload(ctx, i):
+    username = f'bench-register-{ctx["run"]}-{i}'
+    return {
+        'username': username, 'email': f'{username}@example.com', 'first_name': 'Bench', 'last_name': str(i),
+        'password': PASSWORD, 'password2': PASSWORD,
+    }
+
+
+ENDPOINTS = [
+    # Sessions
+    Endpoint('sessions list', 'get', lambda ctx, i: '/api/sessions/'),
+    Endpoint('sessions list (anonymous, cached)', 'get', lambda ctx, i: '/api/sessions/', user=None),
+    Endpoint('sessions list ?course_code', 'get', lambda ctx, i: f'/api/sessions/?course_code={COURSES[0]}'),
+    Endpoint('sessions list ?from', 'get', lambda ctx, i: f'/api/sessions/?from={ctx["today"]}'),
+    Endpoint('sessions list (keyset)', 'get', lambda ctx, i: '/api/sessions/?pagination=cursor'),
+    Endpoint('sessions detail', 'get', lambda ctx, i: f'/api/sessions/{ctx["session_id"]}/'),
+    Endpoint('sessions create', 'post', lambda ctx, i: '/api/sessions/', session_payload, collect=collect_session),
+    Endpoint('sessions update', 'patch', lambda ctx, i: f'/api/sessions/{ctx["created_sessions"][i]}/',
+             lambda ctx, i: {'location': f'Room {i}'}),
+    Endpoint('sessions rsvp', 'post', lambda ctx, i: f'/api/sessions/{ctx["free_session_ids"][i]}/rsvp/'),
+    Endpoint('sessions cancel_rsvp', 'delete', lambda ctx, i: f'/api/sessions/{ctx["free_session_ids"][i]}/cancel_rsvp/'),
+    Endpoint('sessions bulk_rsvp', 'post', lambda ctx, i: '/api/sessions/bulk_rsvp/',
+             lambda ctx, i: {'ids': ctx['free_session_ids'][-(i + 1) * 5:][:5]}),
+    Endpoint('sessions delete', 'delete', lambda ctx, i: f'/api/sessions/{ctx["created_sessions"][i]}/'),
+
+    # Groups
+    Endpoint('groups list', 'get', lambda ctx, i: '/api/groups/'),
+    Endpoint('groups list (anonymous, cached)', 'get', lambda ctx, i: '/api/groups/', user=None),
+    Endpoint('groups list ?subject', 'get', lambda ctx, i: f'/api/groups/?subject={COURSES[0]}'),
+    Endpoint('groups detail', 'get', lambda ctx, i: f'/api/groups/{ctx["group_id"]}/'),
+    Endpoint('groups sessions', 'get', lambda ctx, i: f'/api/groups/{ctx["group_id"]}/sessions/'),
+    Endpoint('groups create', 'post', lambda ctx, i: '/api/groups/',
+             lambda ctx, i: {'name': f'Benchmark group {i}', 'subject': COURSES[0], 'description': 'Benchmark'},
+             collect=collect_group),
+    Endpoint('groups join', 'post', lambda ctx, i: f'/api/groups/{ctx["free_group_ids"][i]}/join/'),
+    Endpoint('groups leave', 'delete', lambda ctx, i: f'/api/groups/{ctx["free_group_ids"][i]}/leave/'),
+    Endpoint('groups bulk_join', 'post', lambda ctx, i: '/api/groups/bulk_join/',
+             lambda ctx, i: {'ids': ctx['free_group_ids'][-(i + 1) * 5:][:5]}),
+    Endpoint('groups delete', 'delete', lambda ctx, i: f'/api/groups/{ctx["created_groups"][i]}/'),
+
+    # Leaderboard, recommendations, search, dashboard
+    Endpoint('leaderboard week', 'get', lambda ctx, i: '/api/leaderboard/?period=week'),
+    Endpoint('leaderboard all', 'get', lambda ctx, i: '/api/leaderboard/?period=all'),
+    Endpoint('leaderboard around me', 'get', lambda ctx, i: '/api/leaderboard/?period=all&around=me'),
+    Endpoint('recommendations', 'get', lambda ctx, i: '/api/recommendations/'),
+    Endpoint('search', 'get', lambda ctx, i: '/api/search/?q=graphs+review'),
+    Endpoint('search ?type=group', 'get', lambda ctx, i: '/api/search/?q=calculus&type=group'),
+    Endpoint('dashboard', 'get', lambda ctx, i: '/api/dashboard/'),
+
+    # Admin
+    Endpoint('admin groups list', 'get', lambda ctx, i: '/api/admin/groups/', user='staff'),
+    Endpoint('admin groups approve', 'patch', lambda ctx, i: f'/api/admin/groups/{ctx["pending_group_ids"][i % len(ctx["pending_group_ids"])]}/approve/',
+             user='staff'),
+    Endpoint('admin groups reject', 'patch', lambda ctx, i: f'/api/admin/groups/{ctx["pending_group_ids"][i % len(ctx["pending_group_ids"])]}/reject/',
+             user='staff'),
+    Endpoint('metrics', 'get', lambda ctx, i: '/api/_metrics', user='staff'),
+
+    # Authentication
+    Endpoint('auth register', 'post', lambda ctx, i: '/api/auth/register/', register_payload, user=None),
+    Endpoint('auth login', 'post', lambda ctx, i: '/api/auth/login/',
+             lambda ctx, i: {'username': ctx['member'].username, 'password': PASSWORD}, user=None),
+    Endpoint('auth refresh', 'post', lambda ctx, i: '/api/auth/refresh/',
+             lambda ctx, i: {'refresh': ctx['refresh']}, user=None),
+    Endpoint('auth me', 'get', lambda ctx, i: '/api/auth/me/'),
+    Endpoint('auth me update', 'patch', lambda ctx, i: '/api/auth/me/', lambda ctx, i: {'first_name': f'Bench{i}'}),
+]
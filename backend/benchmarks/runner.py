@@ -0,0 +1,126 @@
+"""Drive the endpoints through the test client and compare the results with a baseline"""
+import json
+import re
+import time
+
+from django.core.cache import cache
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .endpoints import ENDPOINTS
+
+# PerformanceMiddleware reports the query count of every sampled request
+QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+
+# Latency differences below this are noise on a shared machine
+MIN_REGRESSION_MS = 1.0
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def authorize(ctx):
+    """Add access/refresh tokens for the benchmark users to the context"""
+    for key in ('member', 'staff'):
+        ctx[f'{key}_token'] = str(RefreshToken.for_user(ctx[key]).access_token)
+    ctx['refresh'] = str(RefreshToken.for_user(ctx['member']))
+    ctx.setdefault('run', int(time.time()))
+
+
+@override_settings(METRICS_SAMPLE_RATE=1.0)
+def run_endpoint(client, endpoint, ctx, iterations):
+    """Time one endpoint; returns its result row, or None if the dataset cannot serve it"""
+    headers = {}
+    if endpoint.user:
+        headers['HTTP_AUTHORIZATION'] = f'Bearer {ctx[endpoint.user + "_token"]}'
+
+    timings, queries, statuses = [], [], set()
+    for i in range(iterations):
+        try:
+            path, data = endpoint.request(ctx, i)
+        except (IndexError, KeyError, TypeError, ZeroDivisionError):
+            return None
+        send = getattr(client, endpoint.method)
+        kwargs = {'content_type': 'application/json'} if data is not None else {}
+        started = time.perf_counter()
+        response = send(path, data, **kwargs, **headers) if data is not None else send(path, **headers)
+        timings.append((time.perf_counter() - started) * 1000)
+
+        match = QUERY_COUNT.search(response.get('Server-Timing', ''))
+        queries.append(int(match.group(1)) if match else 0)
+        statuses.add(response.status_code)
+        if endpoint.collect:
+            endpoint.collect(ctx, response)
+
+    return {
+        'p50': round(percentile(timings, 50), 2),
+        'p95': round(percentile(timings, 95), 2),
+        'p99': round(percentile(timings, 99), 2),
+        'queries': percentile(queries, 50),
+        'status': sorted(statuses),
+    }
+
+
+def run_benchmarks(ctx, iterations=20, endpoints=ENDPOINTS):
+    """Run every endpoint in order against the dataset described by ctx"""
+    authorize(ctx)
+    client = Client()
+    # Start from an empty response cache so the anonymous variants include their first miss
+    cache.clear()
+    results = {}
+    for endpoint in endpoints:
+        results[endpoint.name] = run_endpoint(client, endpoint, ctx, iterations)
+    return results
+
+
+def compare(results, baseline, tolerance=0.25):
+    """Return (name, reason) for every endpoint that got slower or issues more queries than the baseline"""
+    regressions = []
+    for name, row in results.items():
+        previous = baseline.get(name)
+        if row is None or previous is None:
+            continue
+        if row['queries'] > previous['queries']:
+            regressions.append((name, f'{previous["queries"]} -> {row["queries"]} queries'))
+        limit = previous['p95'] * (1 + tolerance)
+        if row['p95'] > limit and row['p95'] - previous['p95'] > MIN_REGRESSION_MS:
+            regressions.append((name, f'p95 {previous["p95"]:.1f}ms -> {row["p95"]:.1f}ms'))
+    return regressions
+
+
+def format_report(size, results, baseline=None):
+    baseline = baseline or {}
+    lines = [
+        f'== {size} ==',
+        f'{"endpoint":<36} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8} {"base p95":>9} {"status":>10}',
+    ]
+    for name, row in results.items():
+        if row is None:
+            lines.append(f'{name:<36} {"skipped (dataset too small)":>55}')
+            continue
+        previous = baseline.get(name)
+        base = f'{previous["p95"]:.2f}' if previous else '-'
+        status = ','.join(str(code) for code in row['status'])
+        lines.append(
+            f'{name:<36} {row["p50"]:>8.2f} {row["p95"]:>8.2f} {row["p99"]:>8.2f} '
+            f'{row["queries"]:>8} {base:>9} {status:>10}'
+        )
+    return '\n'.join(lines)
+
+
+def load_baseline(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, baseline):
+    with open(path, 'w') as handle:
+        json.dump(baseline, handle, indent=2, sort_keys=True)
+        handle.write('\n')
@@ -52,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.PerformanceMiddleware',  # First, so it times the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
@@ -94,6 +95,64 @@ DATABASES = {
 }
 
 
+# Cache
+# Anonymous GETs on sessions, groups and the leaderboard are cached with
+# versioned keys (see api/cache.py). LocMemCache is per process; point
+# CACHE_BACKEND at FileBasedCache (or a shared backend) to share it between workers.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='studysphere'),
+    }
+}
+
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
+# How long Idempotency-Key responses are replayed, and how long a key stays claimed
+# by an attempt that never finishes
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=86400, cast=int)
+IDEMPOTENCY_LOCK_TIMEOUT = config('IDEMPOTENCY_LOCK_TIMEOUT', default=60, cast=int)
+
+# Threads hashing passwords for the async login/register views, and how many hashing
+# jobs may run or wait before new sign-ins get 503 Retry-After
+PASSWORD_HASHER_THREADS = config('PASSWORD_HASHER_THREADS', default=4, cast=int)
+PASSWORD_HASHER_QUEUE = config('PASSWORD_HASHER_QUEUE', default=32, cast=int)
+
+# Share of requests that count queries, SQL and serializer time and get a Server-Timing
+# header (0.0-1.0); every request's total time is recorded regardless
+METRICS_SAMPLE_RATE = config('METRICS_SAMPLE_RATE', default=1.0, cast=float)
+
+# Whether every worker shares the default cache, so cache versions bumped by one worker's
+# writes are seen by all of them. False for per-process LocMemCache.
+SHARED_CACHE = config(
+    'SHARED_CACHE',
+    default=CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache',
+    cast=bool,
+)
+
+# Cache users resolved by JWT authentication on safe requests. A write bumps the user's
+# version in the cache it ran against, so this needs a shared cache and is off without one.
+AUTH_USER_CACHE = config('AUTH_USER_CACHE', default=SHARED_CACHE, cast=bool)
+
+# List and leaderboard ETags come from the cache versions alone when the cache is shared,
+# skipping the MAX(updated_at)/COUNT aggregate. Queryset .update() calls and raw SQL that
+# bypass the write paths then keep the old ETag until the next versioned write.
+CONDITIONAL_VERSION_VALIDATORS = config('CONDITIONAL_VERSION_VALIDATORS', default=SHARED_CACHE, cast=bool)
+
+# Lifetime of users cached by JWT authentication; writes invalidate them sooner
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=300, cast=int)
+
+# Lifetime of cached /api/auth/me/ profiles. The user's own XP, badge and membership
+# changes invalidate them at once; other members joining a group (members_count) only
+# show up when the entry expires.
+PROFILE_CACHE_TIMEOUT = config('PROFILE_CACHE_TIMEOUT', default=60, cast=int)
+
+# Seconds between reloads of each process's in-memory XP rank index from the database.
+# Awards made in the process apply at once; other processes' show up on reload, which runs
+# in a background thread while lookups keep using the previous copy.
+RANK_INDEX_RECONCILE_INTERVAL = config('RANK_INDEX_RECONCILE_INTERVAL', default=300, cast=int)
+
+
 # Custom User Model
 AUTH_USER_MODEL = 'api.User'
 
@@ -144,7 +203,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.backends.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',